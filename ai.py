@@ -0,0 +1,77 @@
+import math
+
+import pygame
+
+from game_input import HELD_KEYS, PressedKeys, TickInput
+from spells import COMBOS
+
+
+def _mask(*keys):
+    """Bitmask of HELD_KEYS for the given keys"""
+    mask = 0
+    for key in keys:
+        mask |= 1 << HELD_KEYS.index(key)
+    return mask
+
+
+LEFT, RIGHT, UP, DOWN = _mask(pygame.K_a), _mask(pygame.K_d), _mask(pygame.K_w), _mask(pygame.K_s)
+
+
+class KitingPolicy:
+    """Input source that plays a GameSession on its own.
+
+    Each tick it moves away from enemies within danger_radius (with a
+    weak pull back towards the middle of the screen so it does not get
+    pinned in a corner), aims the mouse at the nearest enemy and types the
+    combo of the first unlocked spell that is off cooldown. It reads the
+    session's enemy grid from the previous tick, like a player reacting to
+    the last frame they saw.
+    """
+    def __init__(self, session, danger_radius=180, aim_range=600, center_pull=0.002):
+        self.session = session
+        self.danger_radius = danger_radius
+        self.aim_range = aim_range
+        self.center_pull = center_pull
+        self.bounds = session.bounds
+
+    def poll(self):
+        session = self.session
+        px, py = session.player.rect.center
+
+        # Flee: every nearby enemy pushes harder the closer it is
+        fx = (self.bounds.centerx - px) * self.center_pull
+        fy = (self.bounds.centery - py) * self.center_pull
+        for enemy in session.enemy_grid.query_radius((px, py), self.danger_radius):
+            dx = px - enemy.rect.centerx
+            dy = py - enemy.rect.centery
+            dist = math.hypot(dx, dy) or 1
+            weight = (self.danger_radius - dist) / (self.danger_radius * dist)
+            fx += dx * weight
+            fy += dy * weight
+
+        mask = 0
+        threshold = 0.1
+        if fx < -threshold:
+            mask |= LEFT
+        elif fx > threshold:
+            mask |= RIGHT
+        if fy < -threshold:
+            mask |= UP
+        elif fy > threshold:
+            mask |= DOWN
+
+        # Aim at the nearest enemy (the automatic projectile and spells follow the mouse)
+        mouse_pos = (px, py)
+        nearest = session.enemy_grid.nearest((px, py), 1, self.aim_range)
+        if nearest:
+            mouse_pos = nearest[0][1].rect.center
+
+        # Cast the first ready spell
+        key_presses = []
+        spell_manager = session.spell_manager
+        for spell_name in spell_manager.unlocked_spells:
+            if spell_manager.get_cooldown(spell_name, session.current_time) == 0:
+                key_presses = list(COMBOS[spell_name])
+                break
+
+        return TickInput(PressedKeys(mask), mouse_pos, key_presses)
@@ -0,0 +1,250 @@
+"""Monte Carlo balance simulator: many AI-played headless sessions across processes.
+
+Every combination of the swept parameters (a "point") is played for
+--sessions sessions by ai.KitingPolicy on a simulated clock. Sessions are
+spread over a ProcessPoolExecutor, and seeds are shared between points so
+that differences come from the parameters rather than the dice. The
+summary file records survival time, level reached, the EXP curve and peak
+entity counts for every point.
+
+Parameters are the module globals of spellwalk or spells listed in
+PARAMS, e.g. enemy_dmg, SPAWNRATE, ENEMY_SPEED or FREEZE_SLOW_PER_LEVEL.
+Some are copied elsewhere at import time, so PARAMS lists every place
+a parameter is read from; names not in it are rejected, rather than
+reporting a sweep that changed nothing.
+
+Usage:
+    python balance.py --sessions 200 --sweep enemy_dmg=1,2,3 --sweep SPAWNRATE=1500,2000
+    python balance.py --sweep FIREBALL_DAMAGE_PER_LEVEL=2,4,6 --minutes 5 --out fireball.json
+"""
+import os
+
+# Must be set before pygame creates the display in spellwalk
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import itertools
+import json
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import spells
+import spellwalk
+from ai import KitingPolicy
+from game_clock import SimClock
+from headless import pick_lowest_level_spell
+from profiler import percentile
+
+EXP_SAMPLE_INTERVAL = 10000  # Simulated milliseconds between EXP curve samples
+_defaults = {}  # Parameter name: original value, for params this worker has changed
+
+
+# Sweepable parameters: name -> every (module, class or dict, key) the game reads it from
+PARAMS = {
+    'enemy_dmg': [(spellwalk, 'enemy_dmg')],
+    'PLAYER_SPEED': [(spellwalk, 'PLAYER_SPEED')],
+    'ENEMY_SPEED': [(spellwalk, 'ENEMY_SPEED'), (spellwalk.Enemy, 'speed')],
+    'TANK_ENEMY_SPEED': [(spellwalk, 'TANK_ENEMY_SPEED'), (spellwalk.TankEnemy, 'speed')],
+    'BOSS_ENEMY_SPEED': [(spellwalk, 'BOSS_ENEMY_SPEED'), (spellwalk.BossEnemy, 'speed')],
+    'PROJECTILE_SPEED': [(spellwalk, 'PROJECTILE_SPEED')],
+    'PROJECTILE_SIZE': [(spellwalk, 'PROJECTILE_SIZE')],
+    'SPAWNRATE': [(spellwalk, 'SPAWNRATE')],
+    'NEXT_WAVE_TIME': [(spellwalk, 'NEXT_WAVE_TIME')],
+    'CHAIN_RANGE': [(spellwalk, 'CHAIN_RANGE')],
+    'FIRE_RATE': [(spellwalk, 'FIRE_RATE')],
+    'LIGHTNING_DAMAGE': [(spells, 'LIGHTNING_DAMAGE')],
+    'LIGHTNING_DAMAGE_PER_LEVEL': [(spells, 'LIGHTNING_DAMAGE_PER_LEVEL')],
+    'LIGHTNING_COOLDOWN': [(spells, 'LIGHTNING_COOLDOWN'), (spells.SPELL_COOLDOWNS, 'lightning')],
+    'LIGHTNING_HIT_RADIUS': [(spells, 'LIGHTNING_HIT_RADIUS'), (spellwalk, 'LIGHTNING_HIT_RADIUS')],
+    'FIREBALL_DAMAGE': [(spells, 'FIREBALL_DAMAGE')],
+    'FIREBALL_DAMAGE_PER_LEVEL': [(spells, 'FIREBALL_DAMAGE_PER_LEVEL')],
+    'FIREBALL_SPEED': [(spells, 'FIREBALL_SPEED')],
+    'FIREBALL_SPEED_PER_LEVEL': [(spells, 'FIREBALL_SPEED_PER_LEVEL')],
+    'FIREBALL_SIZE': [(spells, 'FIREBALL_SIZE')],
+    'FIREBALL_SIZE_PER_LEVEL': [(spells, 'FIREBALL_SIZE_PER_LEVEL')],
+    'FIREBALL_LIFETIME': [(spells, 'FIREBALL_LIFETIME')],
+    'FIREBALL_LIFETIME_PER_LEVEL': [(spells, 'FIREBALL_LIFETIME_PER_LEVEL')],
+    'FIREBALL_COOLDOWN': [(spells, 'FIREBALL_COOLDOWN'), (spells.SPELL_COOLDOWNS, 'fireball')],
+    'EXPLOSION_RADIUS': [(spells, 'EXPLOSION_RADIUS')],
+    'EXPLOSION_RADIUS_PER_LEVEL': [(spells, 'EXPLOSION_RADIUS_PER_LEVEL')],
+    'EXPLOSION_DURATION': [(spells, 'EXPLOSION_DURATION')],
+    'EXPLOSION_DURATION_PER_LEVEL': [(spells, 'EXPLOSION_DURATION_PER_LEVEL')],
+    'EXPLOSION_DAMAGE': [(spells, 'EXPLOSION_DAMAGE')],
+    'EXPLOSION_TICK_RATE': [(spells, 'EXPLOSION_TICK_RATE')],
+    'FREEZE_DURATION': [(spells, 'FREEZE_DURATION')],
+    'FREEZE_DURATION_PER_LEVEL': [(spells, 'FREEZE_DURATION_PER_LEVEL')],
+    'FREEZE_RADIUS': [(spells, 'FREEZE_RADIUS')],
+    'FREEZE_RADIUS_PER_LEVEL': [(spells, 'FREEZE_RADIUS_PER_LEVEL')],
+    'FREEZE_SLOW': [(spells, 'FREEZE_SLOW')],
+    'FREEZE_SLOW_PER_LEVEL': [(spells, 'FREEZE_SLOW_PER_LEVEL')],
+    'FREEZE_MIN_SLOW': [(spells, 'FREEZE_MIN_SLOW')],
+    'FREEZE_COOLDOWN': [(spells, 'FREEZE_COOLDOWN'), (spells.SPELL_COOLDOWNS, 'freeze')],
+}
+
+
+def resolve_param(name):
+    """Return the (target, key) pairs a parameter name is read from"""
+    if name not in PARAMS:
+        raise ValueError(f"{name!r} is not a sweepable parameter (see PARAMS in balance.py)")
+    return PARAMS[name]
+
+
+def set_param(name, value):
+    """Set a parameter everywhere the game reads it from"""
+    for target, key in resolve_param(name):
+        if isinstance(target, dict):
+            target[key] = value
+        else:
+            setattr(target, key, value)
+
+
+def apply_params(params):
+    """Restore every parameter this worker changed, then set params"""
+    for name, value in _defaults.items():
+        set_param(name, value)
+    for name, value in params.items():
+        target, key = resolve_param(name)[0]
+        _defaults.setdefault(name, getattr(target, key))
+        set_param(name, value)
+
+
+def total_exp(level, exp):
+    """EXP earned since the start, given the current level and EXP towards the next one"""
+    return 5 * level * (level - 1) // 2 + exp  # Level L needs L * 5 EXP
+
+
+def run_session(params, seed, max_ms):
+    """Play one AI session with params applied and return its measurements"""
+    apply_params(params)
+    session = spellwalk.GameSession(SimClock(), headless=True, spell_picker=pick_lowest_level_spell, seed=seed)
+    session.input_source = KitingPolicy(session)
+    peak_enemies = peak_projectiles = peak_effects = 0
+    exp_curve = []
+    next_sample = EXP_SAMPLE_INTERVAL
+    while session.running and session.current_time - session.timer < max_ms:
+        session.tick()
+        peak_enemies = max(peak_enemies, len(session.enemies))
+        peak_projectiles = max(peak_projectiles, len(session.projectiles))
+        peak_effects = max(peak_effects, len(session.spell_effects))
+        if session.current_time - session.timer >= next_sample:
+            exp_curve.append(total_exp(session.level, session.exp))
+            next_sample += EXP_SAMPLE_INTERVAL
+    stats = session.finish()
+    return {
+        'params': params,
+        'seed': seed,
+        'survival_ms': stats['sim_ms'],
+        'died': stats['game_over'],
+        'level': stats['level'],
+        'level_times': stats['level_times'],
+        'exp_curve': exp_curve,
+        'peak_enemies': peak_enemies,
+        'peak_projectiles': peak_projectiles,
+        'peak_effects': peak_effects,
+    }
+
+
+def _run_task(task):
+    return run_session(*task)
+
+
+def distribution(values):
+    """Mean and p10/p50/p90 of a list of numbers"""
+    values = sorted(values)
+    return {
+        'mean': statistics.fmean(values),
+        'p10': percentile(values, 0.1),
+        'p50': percentile(values, 0.5),
+        'p90': percentile(values, 0.9),
+    }
+
+
+def summarize(results):
+    """Aggregate the session results of one sweep point"""
+    curve_length = max(len(r['exp_curve']) for r in results)
+    exp_curve = []
+    for i in range(curve_length):
+        # Only sessions still alive at a sample contribute to it
+        samples = [r['exp_curve'][i] for r in results if len(r['exp_curve']) > i]
+        exp_curve.append({'t_s': (i + 1) * EXP_SAMPLE_INTERVAL / 1000, 'mean': statistics.fmean(samples), 'sessions': len(samples)})
+    max_level = max(r['level'] for r in results)
+    level_times = {}
+    for level in range(2, max_level + 1):
+        times = [r['level_times'][level - 2] for r in results if len(r['level_times']) >= level - 1]
+        level_times[level] = {'mean_s': statistics.fmean(times) / 1000, 'sessions': len(times)}
+    return {
+        'params': results[0]['params'],
+        'sessions': len(results),
+        'death_rate': sum(r['died'] for r in results) / len(results),
+        'survival_s': distribution([r['survival_ms'] / 1000 for r in results]),
+        'level': distribution([r['level'] for r in results]),
+        'level_times': level_times,
+        'exp_curve': exp_curve,
+        'peak_enemies': distribution([r['peak_enemies'] for r in results]),
+        'peak_projectiles': distribution([r['peak_projectiles'] for r in results]),
+        'peak_effects': distribution([r['peak_effects'] for r in results]),
+    }
+
+
+def parse_sweep(spec):
+    """Parse NAME=v1,v2,... into (NAME, [values])"""
+    name, _, values = spec.partition('=')
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=v1,v2,... but got {spec!r}")
+    parsed = []
+    for value in values.split(','):
+        try:
+            parsed.append(int(value))
+        except ValueError:
+            parsed.append(float(value))
+    return name, parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep balance parameters over many AI-played sessions")
+    parser.add_argument("--sweep", type=parse_sweep, action="append", default=[], metavar="NAME=v1,v2,...",
+                        help="parameter values to sweep (repeat for a grid)")
+    parser.add_argument("--sessions", type=int, default=100, help="sessions per sweep point")
+    parser.add_argument("--minutes", type=float, default=10, help="simulated minutes before a surviving session stops")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first session at every point")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--out", default="balance_summary.json", help="summary file to write")
+    args = parser.parse_args()
+
+    for name, _ in args.sweep:
+        resolve_param(name)  # Fail before starting any workers
+    names = [name for name, _ in args.sweep]
+    points = [dict(zip(names, values)) for values in itertools.product(*(values for _, values in args.sweep))]
+    max_ms = int(args.minutes * 60000)
+    tasks = [(params, args.seed + i, max_ms) for params in points for i in range(args.sessions)]
+
+    workers = args.workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (workers * 16))  # Few enough round trips, small enough to balance load
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_run_task, tasks, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        'sessions_per_point': args.sessions,
+        'max_minutes': args.minutes,
+        'seed': args.seed,
+        'wall_seconds': elapsed,
+        'points': [summarize(results[i * args.sessions:(i + 1) * args.sessions]) for i in range(len(points))],
+    }
+    with open(args.out, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"{len(tasks)} sessions in {elapsed:.1f}s; summary written to {args.out}")
+    for point in summary['points']:
+        params = ", ".join(f"{name}={value}" for name, value in point['params'].items()) or "defaults"
+        print(f"  {params}: death rate {point['death_rate']:.0%}, "
+              f"survival p50 {point['survival_s']['p50']:.0f}s, level p50 {point['level']['p50']}, "
+              f"peak enemies p90 {point['peak_enemies']['p90']}")
+
+
+if __name__ == "__main__":
+    main()
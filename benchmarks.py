@@ -0,0 +1,255 @@
+"""Scripted stress scenarios for the game loop, with regression thresholds.
+
+Each scenario builds a headless GameSession with a fixed seed, sets up
+entities directly and steps the real game logic from spellwalk.py and
+spells.py. It reports ticks/sec, per-tick frame-time percentiles and peak
+traced memory, then compares them with a stored baseline. Baselines are
+host-specific: record one with --save-baseline on the machine that runs
+the comparison. A run with no baseline to compare against fails rather
+than passing by default.
+
+The "startup" pseudo-scenario times cold starts instead: importing
+spellwalk, and opening the window and drawing the first game frame, each
+in a fresh interpreter (median of STARTUP_RUNS runs).
+
+Usage:
+    python benchmarks.py                      # run all scenarios and compare (fails without a baseline)
+    python benchmarks.py swarm --ticks 300    # run one scenario
+    python benchmarks.py startup              # time import and first frame
+    python benchmarks.py --save-baseline      # record the current results
+"""
+import os
+
+# Must be set before pygame creates the display in spellwalk
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import math
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import spellwalk
+from game_clock import SimClock
+from profiler import percentile
+from quality import QualityGovernor
+from spells import FireballSpell, FreezeSpell
+from headless import pick_lowest_level_spell
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_baseline.json")
+DEFAULT_TICKS = 600  # 10 simulated seconds at 60 ticks per second
+DEFAULT_TOLERANCE = 0.25  # Allowed slowdown before a scenario counts as a regression
+STARTUP = 'startup'
+STARTUP_RUNS = 5
+# Run in a fresh interpreter; prints the timings as JSON on its last line
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import spellwalk
+imported = time.perf_counter()
+from game_clock import SimClock
+session = spellwalk.GameSession(SimClock(), spell_picker=lambda spell_manager: 'lightning')
+session.tick()
+drawn = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'first_frame_ms': (drawn - start) * 1000}))
+"""
+
+
+def random_edge_position(session, rng):
+    """Random point near the edge of the screen"""
+    if rng.random() < 0.5:
+        return (rng.choice([0, spellwalk.WIDTH]), rng.uniform(0, spellwalk.HEIGHT))
+    return (rng.uniform(0, spellwalk.WIDTH), rng.choice([0, spellwalk.HEIGHT]))
+
+
+def spawn(session, enemy_class, count, rng, position=random_edge_position):
+    """Add count enemies of enemy_class at positions chosen by position(session, rng)"""
+    for _ in range(count):
+        enemy = enemy_class.pool.acquire(session.player, rng)
+        enemy.rect.center = position(session, rng)
+        session.enemies.add(enemy)
+
+
+def near_player(session, rng, spread=250):
+    x, y = session.player.rect.center
+    return (x + rng.uniform(-spread, spread), y + rng.uniform(-spread, spread))
+
+
+def random_direction(rng):
+    angle = rng.uniform(0, 2 * math.pi)
+    return (math.cos(angle), math.sin(angle))
+
+
+# --- Scenarios: setup(session, rng) once, then per_tick(session, rng) before every tick ---
+
+def swarm_setup(session, rng):
+    spawn(session, spellwalk.Enemy, 1000, rng)
+    spawn(session, spellwalk.TankEnemy, 200, rng)
+    spawn(session, spellwalk.BossEnemy, 20, rng)
+
+
+def freeze_setup(session, rng):
+    spawn(session, spellwalk.Enemy, 600, rng, near_player)
+
+
+def freeze_tick(session, rng):
+    # Keep 30 overlapping freeze fields alive around the player
+    fields = sum(1 for effect in session.spell_effects if isinstance(effect, FreezeSpell))
+    for _ in range(30 - fields):
+        session.spell_effects.add(FreezeSpell(near_player(session, rng, 100), 3, session.current_time))
+
+
+def chain_setup(session, rng):
+    session.spell_manager.spell_levels['lightning'] = 10
+    spawn(session, spellwalk.Enemy, 600, rng, near_player)
+    spawn(session, spellwalk.TankEnemy, 100, rng, near_player)
+
+
+def chain_tick(session, rng):
+    # Fire a projectile at a random enemy every tick so chain lightning triggers on every hit
+    if len(session.enemies) < 300:
+        spawn(session, spellwalk.Enemy, 100, rng, near_player)
+    target = rng.choice(session.enemies.sprites())
+    px, py = session.player.rect.center
+    dx, dy = target.rect.centerx - px, target.rect.centery - py
+    dist = math.hypot(dx, dy) or 1
+    session.projectiles.add(spellwalk.Projectile.pool.acquire((px, py), (dx / dist, dy / dist), spellwalk.PROJECTILE_SIZE))
+
+
+def explosion_setup(session, rng):
+    spawn(session, spellwalk.Enemy, 600, rng, near_player)
+    spawn(session, spellwalk.TankEnemy, 100, rng, near_player)
+
+
+def explosion_tick(session, rng):
+    # A level-5 fireball every few ticks leaves a carpet of long-lived explosions
+    if len(session.enemies) < 400:
+        spawn(session, spellwalk.Enemy, 100, rng)
+    if session.ticks % 4 == 0:
+        fireball = FireballSpell.pool.acquire(session.player.rect.center, random_direction(rng), 5, session.current_time)
+        session.spell_effects.add(fireball)
+
+
+SCENARIOS = {
+    'swarm': (swarm_setup, None),
+    'freeze_fields': (freeze_setup, freeze_tick),
+    'chain_lightning': (chain_setup, chain_tick),
+    'explosion_carpet': (explosion_setup, explosion_tick),
+}
+
+
+def run_scenario(name, ticks, seed, render=False, trace_memory=False):
+    """Run one scenario and return ticks/sec, frame-time percentiles (ms) and peak memory"""
+    setup, per_tick = SCENARIOS[name]
+    rng = random.Random(seed)
+    session = spellwalk.GameSession(SimClock(), headless=not render, spell_picker=pick_lowest_level_spell, seed=seed)
+    session.quality = QualityGovernor(fixed_level=0)  # Always measure full-quality rendering
+    setup(session, rng)
+
+    if trace_memory:
+        tracemalloc.start()
+    frame_times = []
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if per_tick is not None:
+            per_tick(session, rng)
+        session.player.health = 100  # Keep the player alive for the whole run
+        tick_start = time.perf_counter()
+        session.tick()
+        frame_times.append((time.perf_counter() - tick_start) * 1000)
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    session.finish()
+
+    frame_times.sort()
+    return {
+        'ticks_per_second': ticks / elapsed,
+        'p50_ms': percentile(frame_times, 0.5),
+        'p95_ms': percentile(frame_times, 0.95),
+        'p99_ms': percentile(frame_times, 0.99),
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def measure_startup(runs=STARTUP_RUNS):
+    """Median import time and time to the first drawn frame (ms), each run in a fresh interpreter"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) for key in ('import_ms', 'first_frame_ms')}
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages (empty if everything is within tolerance)"""
+    failures = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if 'ticks_per_second' in result and result['ticks_per_second'] < base['ticks_per_second'] * (1 - tolerance):
+            failures.append(f"{name}: {result['ticks_per_second']:.0f} ticks/s, baseline {base['ticks_per_second']:.0f}")
+        for key in ('p95_ms', 'p99_ms', 'peak_memory_kb', 'import_ms', 'first_frame_ms'):
+            if key in result and base.get(key) and result[key] > base[key] * (1 + tolerance):
+                failures.append(f"{name}: {key} {result[key]:.2f}, baseline {base[key]:.2f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Spellwalk stress scenarios")
+    parser.add_argument("scenarios", nargs="*",
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)}, {STARTUP})")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help="ticks per scenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--render", action="store_true", help="also draw every frame to the (dummy) display")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed relative slowdown")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS and name != STARTUP:
+            parser.error(f"unknown scenario {name!r}")
+
+    results = {}
+    for name in args.scenarios or list(SCENARIOS) + [STARTUP]:
+        if name == STARTUP:
+            results[name] = result = measure_startup()
+            print(f"{name:<18} import {result['import_ms']:6.1f}ms  first frame {result['first_frame_ms']:6.1f}ms")
+            continue
+        result = run_scenario(name, args.ticks, args.seed, args.render)
+        # Memory is measured in a separate run because tracing slows everything down
+        result['peak_memory_kb'] = run_scenario(name, args.ticks, args.seed, args.render, trace_memory=True)['peak_memory_kb']
+        results[name] = result
+        print(f"{name:<18} {result['ticks_per_second']:8.0f} ticks/s  p50 {result['p50_ms']:6.2f}ms  "
+              f"p95 {result['p95_ms']:6.2f}ms  p99 {result['p99_ms']:6.2f}ms  peak {result['peak_memory_kb']:8.0f} KiB")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"saved baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        sys.exit(f"no baseline at {args.baseline} to compare against; run with --save-baseline on this host to record one")
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    failures = compare(results, baseline, args.tolerance)
+    if failures:
+        print("REGRESSION:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"all scenarios within {args.tolerance:.0%} of baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 # Credit to baraltech for the original code(https://www.youtube.com/watch?v=al_V4OGSvFU, https://www.youtube.com/watch?v=GMBqjxcKogA)
+import pygame
+
+
 class Button():
     def __init__(self, image, pos, text_input, font, base_color, hovering_color):
         self.image = image
@@ -7,7 +10,11 @@ class Button():
         self.font = font
         self.base_color, self.hovering_color = base_color, hovering_color
         self.text_input = text_input
-        self.text = self.font.render(self.text_input, True, self.base_color)
+        # Render both states once; change_color only swaps between them
+        self.base_text = self.font.render(self.text_input, True, self.base_color)
+        self.hovering_text = self.font.render(self.text_input, True, self.hovering_color)
+        self.text = self.base_text
+        self.hovering = False
         if self.image is None:
             self.image = self.text
         self.rect = self.image.get_rect(center=(self.x_pos, self.y_pos))
@@ -19,14 +26,74 @@ class Button():
         screen.blit(self.text, self.text_rect)
 
     def check_for_input(self, position):
-        if position[0] in range(self.rect.left, self.rect.right) and position[1] in range(self.rect.top, self.rect.bottom):
-            return True
-        return False
+        return self.rect.collidepoint(position)
 
     def change_color(self, position):
-        if position[0] in range(self.rect.left, self.rect.right) and position[1] in range(self.rect.top, self.rect.bottom):
-            self.text = self.font.render(self.text_input, True, self.hovering_color)
-        else:
-            self.text = self.font.render(self.text_input, True, self.base_color)
+        """Switch to the hover or base text; returns True if the state changed"""
+        hovering = self.rect.collidepoint(position)
+        if hovering == self.hovering:
+            return False
+        self.hovering = hovering
+        self.text = self.hovering_text if hovering else self.base_text
+        return True
+
+
+class Card():
+    """Clickable box with pre-rendered base and hover images"""
+    def __init__(self, rect, lines, base_colors, hovering_colors, border=3):
+        # lines: [(text_surface, top_offset)], colors: (background, border)
+        self.rect = pygame.Rect(rect)
+        self.base_image = self._render(lines, base_colors, border)
+        self.hovering_image = self._render(lines, hovering_colors, border)
+        self.image = self.base_image
+        self.hovering = False
+
+    def _render(self, lines, colors, border):
+        background, border_color = colors
+        image = pygame.Surface(self.rect.size)
+        image.fill(background)
+        pygame.draw.rect(image, border_color, image.get_rect(), border)
+        for text, top in lines:
+            image.blit(text, (self.rect.width // 2 - text.get_width() // 2, top))
+        return image
+
+    def update(self, screen):
+        screen.blit(self.image, self.rect)
+
+    def check_for_input(self, position):
+        return self.rect.collidepoint(position)
+
+    def change_color(self, position):
+        """Switch to the hover or base image; returns True if the state changed"""
+        hovering = self.rect.collidepoint(position)
+        if hovering == self.hovering:
+            return False
+        self.hovering = hovering
+        self.image = self.hovering_image if hovering else self.base_image
+        return True
+
+
+class MenuScreen():
+    """A menu page built once, drawn in full once, then redrawn only where widgets change"""
+    def __init__(self, background, widgets, labels=()):
+        self.background = background
+        self.widgets = widgets  # Buttons and Cards
+        self.labels = labels  # [(surface, pos)] static text
 
+    def draw(self, screen):
+        """Draw the whole page (after entering it or returning from another screen)"""
+        screen.fill(self.background)
+        for surface, pos in self.labels:
+            screen.blit(surface, pos)
+        for widget in self.widgets:
+            widget.update(screen)
 
+    def refresh(self, screen, position):
+        """Redraw widgets whose hover state changed and return their dirty rects"""
+        dirty = []
+        for widget in self.widgets:
+            if widget.change_color(position):
+                screen.fill(self.background, widget.rect)
+                widget.update(screen)
+                dirty.append(widget.rect)
+        return dirty
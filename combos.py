@@ -0,0 +1,59 @@
+from collections import deque
+
+
+class ComboAutomaton:
+    """Aho-Corasick automaton over a table of key sequences.
+
+    combos maps a name to its sequence of keys. The automaton is compiled
+    into a full transition table, so step() is a single dict lookup per
+    keystroke however many combos share prefixes or overlap. A state's
+    matches are the names of every combo that ends at it, in table order.
+    """
+    ROOT = 0
+
+    def __init__(self, combos):
+        self.combos = dict(combos)
+        self.alphabet = {key for sequence in self.combos.values() for key in sequence}
+
+        # Trie of all sequences
+        children = [{}]
+        matches = [[]]
+        for name, sequence in self.combos.items():
+            state = self.ROOT
+            for key in sequence:
+                if key not in children[state]:
+                    children.append({})
+                    matches.append([])
+                    children[state][key] = len(children) - 1
+                state = children[state][key]
+            matches[state].append(name)
+
+        # Breadth-first pass filling in failure transitions, so that every
+        # state has an edge for every key in the alphabet
+        self.transitions = [dict() for _ in children]
+        fail = [self.ROOT] * len(children)
+        queue = deque()
+        for key in self.alphabet:
+            child = children[self.ROOT].get(key, self.ROOT)
+            self.transitions[self.ROOT][key] = child
+            if child != self.ROOT:
+                queue.append(child)
+        while queue:
+            state = queue.popleft()
+            # Combos ending in this state's longest proper suffix also complete here
+            matches[state] = matches[state] + [name for name in matches[fail[state]] if name not in matches[state]]
+            for key in self.alphabet:
+                child = children[state].get(key)
+                if child is None:
+                    self.transitions[state][key] = self.transitions[fail[state]][key]
+                else:
+                    fail[child] = self.transitions[fail[state]][key]
+                    self.transitions[state][key] = child
+                    queue.append(child)
+
+        order = list(self.combos)
+        self.matches = [tuple(sorted(names, key=order.index)) for names in matches]
+
+    def step(self, state, key):
+        """Return the state after key is pressed in state"""
+        return self.transitions[state].get(key, self.ROOT)
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class DamageBuffer:
+    """Per-tick buffer of (enemy, amount, source) hits on an EnemyGroup.
+
+    Spells and collisions emit() hits as they find them; resolve() then
+    subtracts all of them from the store's health array in one vectorized
+    pass, kills enemies at zero health and awards each type's exp_reward
+    once, however many hits landed on it. is_lethal() tells whether the
+    hits queued so far will kill an enemy, so code that picks targets
+    later in the tick can pass over enemies that are already doomed.
+    """
+    def __init__(self, enemies):
+        self.enemies = enemies
+        self.targets = []
+        self.amounts = []
+        self.pending = {}  # enemy: damage queued for it since the last resolve()
+        self.damage_by_source = {}  # source: total damage emitted
+        self.kills_by_type = {}  # enemy class name: kills
+
+    def emit(self, enemy, amount, source):
+        """Queue amount of damage to enemy from source (e.g. 'lightning')"""
+        self.targets.append(enemy)
+        self.amounts.append(amount)
+        self.pending[enemy] = self.pending.get(enemy, 0) + amount
+        self.damage_by_source[source] = self.damage_by_source.get(source, 0) + amount
+
+    def is_lethal(self, enemy):
+        """True if the damage queued for enemy will kill it when resolved"""
+        pending = self.pending.get(enemy)
+        return pending is not None and enemy.health <= pending
+
+    def resolve(self):
+        """Apply all queued damage, kill enemies at zero health and return the EXP earned"""
+        if not self.targets:
+            return 0
+        self.pending = {}
+
+        store = self.enemies.store
+        # Enemies already removed this tick have no slot and take no damage
+        hits = [(enemy.slot, amount) for enemy, amount in zip(self.targets, self.amounts) if enemy.store is store]
+        self.targets = []
+        self.amounts = []
+        if not hits:
+            return 0
+
+        slots = np.fromiter((slot for slot, _ in hits), dtype=np.intp, count=len(hits))
+        amounts = np.fromiter((amount for _, amount in hits), dtype=store.health.dtype, count=len(hits))
+        np.subtract.at(store.health, slots, amounts)
+
+        # Look up sprites before killing any, since kill() moves rows around
+        dead_slots = np.unique(slots[store.health[slots] <= 0])
+        dead = [store.sprites[slot] for slot in dead_slots.tolist()]
+        exp = 0
+        for enemy in dead:
+            exp += enemy.exp_reward
+            name = type(enemy).__name__
+            self.kills_by_type[name] = self.kills_by_type.get(name, 0) + 1
+            enemy.kill()
+        return exp
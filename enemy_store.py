@@ -0,0 +1,187 @@
+import math
+
+import numpy as np
+import pygame
+
+
+class StoredEnemy(pygame.sprite.Sprite):
+    """Base for enemies whose movement state lives in an EnemyStore.
+
+    Subclasses set the class attributes below. While the sprite is in an
+    EnemyGroup its health and speed_multiplier read and write the store's
+    arrays; outside a group they are plain attributes.
+    """
+    speed = 1
+    max_health = 1
+
+    def __init__(self):
+        super().__init__()
+        self.store = None  # EnemyStore holding this sprite's state, if any
+        self.slot = None  # Row of this sprite in the store arrays
+        self._health = self.max_health
+        self._speed_multiplier = 1.0  # For spell effects
+
+    @property
+    def health(self):
+        if self.store is None:
+            return self._health
+        return int(self.store.health[self.slot])
+
+    @health.setter
+    def health(self, value):
+        if self.store is None:
+            self._health = value
+        else:
+            self.store.health[self.slot] = value
+
+    @property
+    def speed_multiplier(self):
+        if self.store is None:
+            return self._speed_multiplier
+        return float(self.store.speed_multiplier[self.slot])
+
+    @speed_multiplier.setter
+    def speed_multiplier(self, value):
+        if self.store is None:
+            self._speed_multiplier = value
+        else:
+            self.store.speed_multiplier[self.slot] = value
+
+    def move_towards(self, target):
+        """Step this sprite alone towards target (used outside an EnemyGroup)"""
+        dx = target[0] - self.rect.centerx
+        dy = target[1] - self.rect.centery
+        dist = math.hypot(dx, dy)
+        if dist == 0:
+            dist = 1  # Prevent division by zero
+        dx, dy = dx / dist, dy / dist  # Normalize direction vector
+
+        self.rect.x += dx * self.speed * self.speed_multiplier
+        self.rect.y += dy * self.speed * self.speed_multiplier
+
+
+class EnemyStore:
+    """Structure-of-arrays storage for enemy positions, speeds and health.
+
+    Rows 0..count-1 are live; removing a sprite moves the last row into its
+    slot so the arrays stay packed and can be stepped in one vectorized pass.
+    """
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.sprites = []  # Row index -> sprite
+        self.pos = np.zeros((capacity, 2))  # Float centers, so slow enemies don't stall on rect truncation
+        self.prev_pos = np.zeros((capacity, 2))  # Centers before the last step, for interpolated drawing
+        self.size = np.zeros((capacity, 2), dtype=int)  # Rect sizes, for batched drawing
+        self.speed = np.zeros(capacity)
+        self.speed_multiplier = np.ones(capacity)
+        self.health = np.zeros(capacity, dtype=np.int32)
+        self.uid = np.zeros(capacity, dtype=np.int64)  # Sprite uids, for excluding enemies an effect already handled
+
+    def _grow(self):
+        capacity = len(self.speed) * 2
+        for name in ('pos', 'prev_pos', 'size', 'speed', 'speed_multiplier', 'health', 'uid'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, sprite):
+        """Copy a sprite's state into a new row and attach the sprite to it"""
+        if self.count == len(self.speed):
+            self._grow()
+        slot = self.count
+        self.pos[slot] = self.prev_pos[slot] = sprite.rect.center
+        self.size[slot] = sprite.rect.size
+        self.speed[slot] = sprite.speed
+        self.speed_multiplier[slot] = sprite._speed_multiplier
+        self.health[slot] = sprite._health
+        self.uid[slot] = sprite.uid
+        self.sprites.append(sprite)
+        sprite.store = self
+        sprite.slot = slot
+        self.count += 1
+
+    def remove(self, sprite):
+        """Write a sprite's row back to the sprite and release the row"""
+        slot = sprite.slot
+        sprite._health = int(self.health[slot])
+        sprite._speed_multiplier = float(self.speed_multiplier[slot])
+        sprite.store = None
+        sprite.slot = None
+
+        last = self.count - 1
+        if slot != last:
+            moved = self.sprites[last]
+            self.pos[slot] = self.pos[last]
+            self.prev_pos[slot] = self.prev_pos[last]
+            self.size[slot] = self.size[last]
+            self.speed[slot] = self.speed[last]
+            self.speed_multiplier[slot] = self.speed_multiplier[last]
+            self.health[slot] = self.health[last]
+            self.uid[slot] = self.uid[last]
+            self.sprites[slot] = moved
+            moved.slot = slot
+        self.sprites.pop()
+        self.count = last
+
+    def reorder(self, sprites):
+        """Move rows so that sprites[i] (every sprite in the store) is in row i"""
+        rows = np.array([sprite.slot for sprite in sprites], dtype=np.intp)
+        n = self.count
+        for name in ('pos', 'prev_pos', 'size', 'speed', 'speed_multiplier', 'health', 'uid'):
+            array = getattr(self, name)
+            array[:n] = array[rows]
+        self.sprites = list(sprites)
+        for slot, sprite in enumerate(self.sprites):
+            sprite.slot = slot
+
+    def within(self, center, radius, exclude_uids=()):
+        """Sprites whose rect center is within radius of center, leaving out those whose uid is in exclude_uids"""
+        n = self.count
+        delta = np.rint(self.pos[:n]) - center
+        rows = np.flatnonzero((delta * delta).sum(axis=1) <= radius * radius)
+        if exclude_uids and len(rows):
+            excluded = np.fromiter(exclude_uids, dtype=np.int64, count=len(exclude_uids))
+            rows = rows[~np.isin(self.uid[rows], excluded)]
+        sprites = self.sprites
+        return [sprites[row] for row in rows.tolist()]
+
+    def interpolated_centers(self, alpha):
+        """Centers alpha of the way from each enemy's previous position to its current one"""
+        n = self.count
+        prev = self.prev_pos[:n]
+        return prev + (self.pos[:n] - prev) * alpha
+
+    def step(self, target, scale=1.0):
+        """Move every enemy one step (scale times its speed) towards target and sync their rects"""
+        n = self.count
+        if n == 0:
+            return
+        pos = self.pos[:n]
+        self.prev_pos[:n] = pos
+        delta = np.asarray(target, dtype=float) - pos
+        dist = np.hypot(delta[:, 0], delta[:, 1])
+        dist[dist == 0] = 1  # Prevent division by zero
+        pos += delta * (self.speed[:n] * self.speed_multiplier[:n] * scale / dist)[:, None]
+
+        for sprite, center in zip(self.sprites, np.rint(pos).astype(int).tolist()):
+            sprite.rect.center = center
+
+
+class EnemyGroup(pygame.sprite.Group):
+    """Sprite group that keeps its members' state in an EnemyStore"""
+    def __init__(self, *sprites):
+        self.store = EnemyStore()
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, *args):
+        super().add_internal(sprite, *args)
+        self.store.add(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.store.remove(sprite)
+
+    def update(self, target, scale=1.0):
+        """Move all enemies towards target in one vectorized step"""
+        self.store.step(target, scale)
@@ -0,0 +1,38 @@
+import pygame
+
+
+class RealClock:
+    """Wall-clock timing backed by pygame, capped at a target frame rate"""
+    def __init__(self, fps=60):
+        if not pygame.get_init():
+            pygame.init()  # get_ticks() counts from here
+        self.fps = fps
+        self._clock = pygame.time.Clock()
+
+    def get_ticks(self):
+        """Milliseconds since pygame.init()"""
+        return pygame.time.get_ticks()
+
+    def tick(self):
+        """Wait for the next frame and return the elapsed milliseconds"""
+        return self._clock.tick(self.fps)
+
+
+class SimClock:
+    """Simulated clock that advances a fixed step per tick without sleeping.
+
+    Scheduled events follow simulated time, so spawn rates stay the same
+    no matter how fast the loop runs.
+    """
+    def __init__(self, step=1000 / 60):
+        self.step = step
+        self.time = 0.0
+
+    def get_ticks(self):
+        """Simulated milliseconds since the clock was created"""
+        return int(self.time)
+
+    def tick(self):
+        """Advance one step and return it"""
+        self.time += self.step
+        return self.step
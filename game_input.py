@@ -0,0 +1,79 @@
+from collections import deque
+
+import pygame
+
+# Keys whose held state the game reads every tick (player movement)
+HELD_KEYS = (
+    pygame.K_LEFT, pygame.K_a, pygame.K_RIGHT, pygame.K_d,
+    pygame.K_UP, pygame.K_w, pygame.K_DOWN, pygame.K_s,
+)
+
+
+class PressedKeys:
+    """Held-key state stored as a bitmask over HELD_KEYS, indexable like key.get_pressed()"""
+    def __init__(self, mask=0):
+        self.mask = mask
+
+    @classmethod
+    def from_pressed(cls, pressed):
+        """Build from the result of pygame.key.get_pressed()"""
+        mask = 0
+        for bit, key in enumerate(HELD_KEYS):
+            if pressed[key]:
+                mask |= 1 << bit
+        return cls(mask)
+
+    def __getitem__(self, key):
+        if key not in HELD_KEYS:
+            return False
+        return bool(self.mask >> HELD_KEYS.index(key) & 1)
+
+
+class TickInput:
+    """Everything the game reads from the player in one tick"""
+    def __init__(self, keys, mouse_pos, key_presses, quit_requested=False):
+        self.keys = keys  # PressedKeys
+        self.mouse_pos = mouse_pos
+        self.key_presses = key_presses  # Keys from this tick's KEYDOWN events, in order
+        self.quit_requested = quit_requested
+
+
+class LiveInput:
+    """Reads input from pygame's keyboard, mouse and event queue"""
+    def poll(self):
+        """Drain the event queue and return this tick's TickInput"""
+        key_presses = []
+        quit_requested = False
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                quit_requested = True
+            elif event.type == pygame.KEYDOWN:
+                key_presses.append(event.key)
+        keys = PressedKeys.from_pressed(pygame.key.get_pressed())
+        return TickInput(keys, pygame.mouse.get_pos(), key_presses, quit_requested)
+
+
+class IdleInput:
+    """Input source that never presses anything (the default for headless sessions)"""
+    def poll(self):
+        return TickInput(PressedKeys(), (0, 0), [])
+
+
+class QueuedInput:
+    """Hands out TickInputs polled ahead of time, for a simulation running on another thread.
+
+    pygame's event queue has to be pumped from the thread that opened the
+    window, so that thread calls fill() with the number of steps it is
+    about to hand over, and each step's poll() takes the next input.
+    """
+    def __init__(self, source):
+        self.source = source
+        self.pending = deque()
+
+    def fill(self, count):
+        """Poll the wrapped source once per upcoming step"""
+        for _ in range(count):
+            self.pending.append(self.source.poll())
+
+    def poll(self):
+        return self.pending.popleft()
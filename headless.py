@@ -0,0 +1,59 @@
+"""Run Spellwalk sessions without a window and without a frame cap.
+
+The game loop in spellwalk.play() is stepped on a simulated clock, so a
+session that takes minutes of wall-clock time finishes in seconds.
+
+Usage: python headless.py --sessions 5 --seed 1 --max-ticks 36000
+       python headless.py --max-ticks 216000 --memory-audit   # an hour of play
+"""
+import os
+
+# Must be set before pygame creates the display in spellwalk
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+
+import spellwalk
+from game_clock import SimClock
+from spells import SPELL_INFO
+
+
+def pick_lowest_level_spell(spell_manager):
+    """Spell picker for unattended runs: upgrade the least-levelled spell"""
+    return min(SPELL_INFO, key=spell_manager.get_spell_level)
+
+
+def run_session(seed=None, max_ticks=None, step=1000 / 60):
+    """Run one headless session and return its stats"""
+    clock = SimClock(step)
+    return spellwalk.play(clock, headless=True, spell_picker=pick_lowest_level_spell, max_ticks=max_ticks, seed=seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless, uncapped Spellwalk sessions")
+    parser.add_argument("--sessions", type=int, default=1, help="number of sessions to run")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the first session (incremented per session)")
+    parser.add_argument("--max-ticks", type=int, default=None, help="stop each session after this many ticks")
+    parser.add_argument("--memory-audit", action="store_true",
+                        help="print the top memory growth sites every wave and at the end of each session")
+    args = parser.parse_args()
+    spellwalk.MEMORY_AUDIT = args.memory_audit
+
+    total_ticks = 0
+    total_seconds = 0.0
+    for i in range(args.sessions):
+        seed = None if args.seed is None else args.seed + i
+        stats = run_session(seed, args.max_ticks)
+        total_ticks += stats['ticks']
+        total_seconds += stats['wall_seconds']
+        print(f"session {i + 1}: {stats['ticks']} ticks ({stats['sim_ms'] / 1000:.1f}s simulated) "
+              f"in {stats['wall_seconds']:.2f}s, {stats['ticks_per_second']:.0f} ticks/s, "
+              f"LVL {stats['level']}, wave {stats['wave']}")
+
+    if args.sessions > 1 and total_seconds > 0:
+        print(f"total: {total_ticks} ticks in {total_seconds:.2f}s, {total_ticks / total_seconds:.0f} ticks/s")
+
+
+if __name__ == "__main__":
+    main()
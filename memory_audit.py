@@ -0,0 +1,65 @@
+import fnmatch
+import gc
+import os
+import tracemalloc
+
+# Allocations made by the audit itself (and by imports) are not the game's
+IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, fnmatch.__file__),  # Matching these filters
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _site(frame):
+    """filename:lineno, relative to the working directory when it is under it"""
+    filename = frame.filename
+    relative = os.path.relpath(filename)
+    if not relative.startswith('..'):
+        filename = relative
+    return f"{filename}:{frame.lineno}"
+
+
+class MemoryAudit:
+    """Traces allocations and reports where memory grew, once per wave.
+
+    snapshot() collects garbage, takes a tracemalloc snapshot and prints
+    the top lines by growth since the previous one; close() prints the
+    growth over the whole session and stops tracing (if the audit
+    started it). Tracing slows the game down several times, so this is a
+    diagnostic mode (--memory-audit) for hunting slow creep in long
+    sessions, not something to leave on.
+    """
+    def __init__(self, top=10, frames=1):
+        self.top = top
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start(frames)
+        self.first = self.previous = self._take()
+
+    def _take(self):
+        gc.collect()  # Only count memory that is still reachable
+        return tracemalloc.take_snapshot().filter_traces(IGNORED)
+
+    def snapshot(self, label):
+        """Print the top growth sites since the last snapshot"""
+        current = self._take()
+        self.report(label, current, self.previous)
+        self.previous = current
+
+    def report(self, label, current, baseline):
+        """Print traced memory and the top lines that grew between two snapshots"""
+        total = sum(trace.size for trace in current.traces)
+        growth = total - sum(trace.size for trace in baseline.traces)
+        print(f"memory audit, {label}: {total / 1024:.0f} KiB traced ({growth / 1024:+.0f} KiB)")
+        grown = [stat for stat in current.compare_to(baseline, 'lineno') if stat.size_diff > 0]
+        for stat in grown[:self.top]:
+            print(f"  {stat.size_diff / 1024:+9.1f} KiB {stat.count_diff:+7d} blocks  {_site(stat.traceback[0])}")
+
+    def close(self):
+        """Print the growth over the whole audit and stop tracing"""
+        self.report("whole session", self._take(), self.first)
+        if self.started:
+            tracemalloc.stop()
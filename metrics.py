@@ -0,0 +1,144 @@
+import bisect
+import gc
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the frame-time histogram buckets; 1/60 s is the frame budget
+FRAME_BUCKETS = (0.001, 0.002, 0.004, 0.008, 1 / 60, 1 / 30, 0.05, 0.1, 0.25)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _labels(name, value):
+    return f'{{{name}="{value}"}}'
+
+
+class MetricsExporter:
+    """Serves live game metrics in Prometheus text format from a background thread.
+
+    GameSession.tick() calls record_frame() with every frame's work time
+    and sample() once per frame while the session is not being stepped;
+    sample() only reads the session every sample_frames frames, so the
+    per-frame cost is a bisect into the frame-time buckets. Spell casts
+    are counted by count_cast(), and GC pauses through gc.callbacks.
+    Counters run for the life of the process; gauges describe the
+    current (or last) session. GET /metrics on host:port returns them
+    all; port 0 picks a free port (see port).
+    """
+    def __init__(self, port=9100, host='127.0.0.1', sample_frames=30):
+        self.sample_frames = sample_frames
+        self.lock = threading.RLock()  # Re-entrant: a GC callback can fire while this thread holds it
+        self.frame_counts = [0] * (len(FRAME_BUCKETS) + 1)  # Last one is +Inf
+        self.frame_sum = 0.0
+        self.frames = 0
+        self.enemies = {}  # Enemy class name: count
+        self.effects = {}  # Effect class name: count
+        self.projectiles = 0
+        self.exp = 0
+        self.level = 0
+        self.wave = 0
+        self.spell_casts = Counter()
+        self.gc_collections = [0, 0, 0]  # Per generation
+        self.gc_pause_seconds = [0.0, 0.0, 0.0]
+        self._gc_start = 0.0
+        gc.callbacks.append(self._on_gc)
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes every few seconds would flood the console
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        self.thread.start()
+
+    def record_frame(self, frame_ms):
+        """Add one frame's work time to the histogram"""
+        seconds = frame_ms / 1000
+        with self.lock:
+            self.frame_counts[bisect.bisect_left(FRAME_BUCKETS, seconds)] += 1
+            self.frame_sum += seconds
+            self.frames += 1
+
+    def sample(self, session):
+        """Read entity counts and progress from a session that is between steps (every sample_frames frames)"""
+        if session.frames % self.sample_frames:
+            return
+        enemies = Counter(type(enemy).__name__ for enemy in session.enemies.store.sprites)
+        effects = Counter(type(effect).__name__ for effect in session.spell_effects)
+        with self.lock:
+            self.enemies = {name: enemies.get(name, 0) for name in set(enemies) | set(self.enemies)}
+            self.effects = {name: effects.get(name, 0) for name in set(effects) | set(self.effects)}
+            self.projectiles = len(session.projectiles)
+            self.exp = session.exp
+            self.level = session.level
+            self.wave = session.wave
+
+    def count_cast(self, spell_name):
+        """Count one cast of spell_name"""
+        with self.lock:
+            self.spell_casts[spell_name] += 1
+
+    def _on_gc(self, phase, info):
+        if phase == 'start':
+            self._gc_start = time.perf_counter()
+            return
+        generation = info['generation']
+        with self.lock:
+            self.gc_collections[generation] += 1
+            self.gc_pause_seconds[generation] += time.perf_counter() - self._gc_start
+
+    def render(self):
+        """All metrics in Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP spellwalk_{name} {help_text}")
+            lines.append(f"# TYPE spellwalk_{name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"spellwalk_{name}{suffix}{labels} {value}")
+
+        with self.lock:
+            buckets = []
+            cumulative = 0
+            for bound, count in zip(FRAME_BUCKETS + ('+Inf',), self.frame_counts):
+                cumulative += count
+                buckets.append(('_bucket', _labels('le', bound), cumulative))
+            metric('frame_seconds', 'histogram', "Work time per frame, excluding the frame-rate wait",
+                   buckets + [('_sum', '', self.frame_sum), ('_count', '', self.frames)])
+            metric('enemies', 'gauge', "Live enemies by type",
+                   [('', _labels('type', name), count) for name, count in sorted(self.enemies.items())])
+            metric('projectiles', 'gauge', "Live projectiles", [('', '', self.projectiles)])
+            metric('spell_effects', 'gauge', "Live spell effects by type",
+                   [('', _labels('type', name), count) for name, count in sorted(self.effects.items())])
+            metric('spell_casts_total', 'counter', "Spells cast by type",
+                   [('', _labels('spell', name), count) for name, count in sorted(self.spell_casts.items())])
+            metric('exp', 'gauge', "EXP towards the next level", [('', '', self.exp)])
+            metric('level', 'gauge', "Player level (LVL)", [('', '', self.level)])
+            metric('wave', 'gauge', "Enemy wave", [('', '', self.wave)])
+            metric('gc_collections_total', 'counter', "Garbage collections by generation",
+                   [('', _labels('generation', g), count) for g, count in enumerate(self.gc_collections)])
+            metric('gc_pause_seconds_total', 'counter', "Time spent in garbage collection by generation",
+                   [('', _labels('generation', g), pause) for g, pause in enumerate(self.gc_pause_seconds)])
+        return '\n'.join(lines) + '\n'
+
+    def close(self):
+        """Stop serving and stop counting GC pauses"""
+        gc.callbacks.remove(self._on_gc)
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,142 @@
+import threading
+
+import numpy as np
+
+from spells import FireballSpell
+
+
+def sprite_batch(sprites):
+    """(images, previous centers, centers, sizes) of sprites that track prev_pos and pos"""
+    images = [sprite.image for sprite in sprites]
+    if not images:
+        return images, None, None, None
+    return (images, np.array([sprite.prev_pos for sprite in sprites]), np.array([sprite.pos for sprite in sprites]),
+            np.array([sprite.rect.size for sprite in sprites]))
+
+
+def interpolated(batch, alpha):
+    """(images, centers, sizes) of a sprite_batch() alpha of the way between its two positions, for blit_centered()"""
+    images, prev, pos, sizes = batch
+    if not images:
+        return images, None, None
+    return images, prev + (pos - prev) * alpha, sizes
+
+
+class FrameState:
+    """Everything draw_game() reads, copied out of a session between simulation steps.
+
+    Moving sprites are reduced to sprite_batch() tuples and the HUD to
+    plain values, so the frame can be drawn while the simulation already
+    works on the next steps. Lightning, freeze and explosion effects
+    don't change after they are created (and aren't pooled), so they
+    are kept by reference.
+    """
+    def __init__(self, session):
+        player = session.player
+        self.player = sprite_batch([player])
+        store = session.enemies.store
+        n = store.count
+        self.enemies = ([enemy.image for enemy in store.sprites], store.prev_pos[:n].copy(), store.pos[:n].copy(),
+                        store.size[:n].copy())
+        self.projectiles = sprite_batch(session.projectiles)
+        self.effects = []
+        fireballs = []
+        for effect in session.spell_effects:
+            if isinstance(effect, FireballSpell):
+                fireballs.append(effect)
+            else:
+                self.effects.append(effect)
+        self.fireballs = sprite_batch(fireballs)
+
+        # HUD values
+        self.current_time = current_time = session.current_time
+        self.health = player.health
+        self.exp = session.exp
+        self.level = session.level
+        spell_manager = session.spell_manager
+        self.cooldowns = [(spell_key, spell_manager.get_cooldown(spell_key, current_time))
+                          for spell_key in spell_manager.unlocked_spells]
+
+
+class SimulationWorker:
+    """Runs a session's simulation steps on a background thread.
+
+    Each frame the main thread hands over a batch of steps with start()
+    and draws the FrameState it captured before, then calls wait() before
+    it touches the session again. Simulation and drawing overlap for as
+    long as drawing, display flips and the frame-rate wait release the
+    GIL. Menus a step needs are passed back with call_on_main() and shown
+    from wait(), since the window and its events belong to the main
+    thread. An exception raised by a step is re-raised from wait().
+    """
+    def __init__(self, session):
+        self.session = session
+        self.condition = threading.Condition()
+        self.steps = 0  # Steps in the batch being run, 0 when idle
+        self.request = None  # (function, args) a step wants run on the main thread
+        self.result = None
+        self.error = None
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def start(self, steps):
+        """Run steps simulation steps in the background"""
+        with self.condition:
+            self.steps = steps
+            self.condition.notify_all()
+
+    def wait(self):
+        """Block until the current batch is done, serving any menu it asks for"""
+        with self.condition:
+            while self.steps:
+                if self.request is not None:
+                    function, args = self.request
+                    self.result = function(*args)
+                    self.request = None
+                    self.condition.notify_all()
+                else:
+                    self.condition.wait()
+            error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def call_on_main(self, function, *args):
+        """From a step, run function on the main thread (during its wait()) and return the result"""
+        with self.condition:
+            self.request = (function, args)
+            self.condition.notify_all()
+            while self.request is not None:
+                if self.stopped:
+                    raise RuntimeError("simulation stopped while waiting for the main thread")
+                self.condition.wait()
+            return self.result
+
+    def stop(self):
+        """Let the batch in flight finish, then end the thread"""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        self.thread.join()
+
+    def _run(self):
+        session = self.session
+        while True:
+            with self.condition:
+                while not self.steps and not self.stopped:
+                    self.condition.wait()
+                if not self.steps:
+                    return  # Stopped
+                steps = self.steps
+            error = None
+            try:
+                for _ in range(steps):
+                    if not session.running:
+                        break
+                    session.step()
+            except Exception as e:
+                error = e
+            with self.condition:
+                self.error = error
+                self.steps = 0
+                self.condition.notify_all()
@@ -0,0 +1,88 @@
+import itertools
+
+import pygame
+
+_surfaces = {}  # key: shared pygame.Surface
+_uids = itertools.count(1)
+
+
+def cached_surface(key, build):
+    """Return the shared surface for key, calling build() the first time.
+
+    Cached surfaces are shared by every sprite that uses them, so they
+    must never be drawn on after creation.
+    """
+    surface = _surfaces.get(key)
+    if surface is None:
+        surface = build()
+        _surfaces[key] = surface
+    return surface
+
+
+def solid_surface(size, color):
+    """Shared surface of the given size filled with color"""
+    def build():
+        surface = pygame.Surface(size)
+        surface.fill(color)
+        return surface
+    return cached_surface(('solid', size, color), build)
+
+
+def blank_surface():
+    """Shared 1x1 transparent surface for sprites that draw themselves"""
+    return cached_surface(('blank',), lambda: pygame.Surface((1, 1), pygame.SRCALPHA))
+
+
+class Pool:
+    """Free list of killed sprites of one class, handed out again by acquire()"""
+    def __init__(self, cls, max_free=1024):
+        self.cls = cls
+        self.max_free = max_free
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args, **kwargs):
+        """Return a reset sprite from the free list, or a new one if it is empty"""
+        if self.free:
+            sprite = self.free.pop()
+            sprite.uid = next(_uids)
+            sprite.reset(*args, **kwargs)
+            self.reused += 1
+            return sprite
+        self.created += 1
+        return self.cls(*args, **kwargs)
+
+    def release(self, sprite):
+        """Put a killed sprite back on the free list"""
+        if len(self.free) < self.max_free:
+            self.free.append(sprite)
+
+
+class PooledSprite(pygame.sprite.Sprite):
+    """Sprite that returns itself to its class pool when killed.
+
+    Subclasses implement reset() with the same arguments as __init__ and
+    set a Pool as the class attribute pool. uid is unique per spawn, so
+    code that remembers sprites across ticks can tell a recycled sprite
+    from its previous life. Subclasses that point back at their session
+    (its player, say) drop those references in forget(), so sprites
+    waiting in a pool don't keep a finished session alive.
+    """
+    pool = None
+
+    def __init__(self):
+        super().__init__()
+        self.uid = next(_uids)
+
+    def forget(self):
+        """Drop references into the session before going back to the pool"""
+        pass
+
+    def kill(self):
+        if not self.alive():
+            return  # Already dead (and possibly already back in the pool)
+        super().kill()
+        if self.pool is not None:
+            self.forget()
+            self.pool.release(self)
@@ -0,0 +1,115 @@
+import csv
+import time
+from collections import deque
+
+import pygame
+
+from text_cache import render_text
+
+# Phases of one play() frame, in the order they run ('sync' waits for the steps of a threaded simulation)
+PHASES = ('wait', 'sync', 'events', 'combos', 'updates', 'spells', 'status', 'collisions', 'snapshot', 'draw', 'hud', 'flip')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class NullProfiler:
+    """Profiler that records nothing (used for headless runs)"""
+    show_overlay = False
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def draw_overlay(self, surface):
+        return None
+
+    def close(self):
+        pass
+
+
+class FrameProfiler:
+    """Times each phase of a frame into a ring buffer of recent frames.
+
+    mark(phase) charges the time since the previous mark to phase, so
+    one perf_counter() call per phase is the whole per-frame cost. The
+    overlay shows rolling p50/p95/p99 per phase and is toggled with F3.
+    """
+    def __init__(self, phases=PHASES, capacity=3600, csv_path=None, summary_interval=30):
+        self.phases = phases
+        self.csv_path = csv_path
+        self.summary_interval = summary_interval  # Frames between overlay percentile refreshes
+        self.rows = deque(maxlen=capacity)  # (frame, total_ms, phase_ms...)
+        self.frame = 0
+        self.show_overlay = False
+        self._index = {phase: i for i, phase in enumerate(phases)}
+        self._current = [0.0] * len(phases)
+        self._start = 0.0
+        self._last = 0.0
+        self._summary = {}
+        self._font_name = None  # Monospace font for the overlay, looked up on first draw
+
+    def begin_frame(self):
+        self._current = [0.0] * len(self.phases)
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """Charge the time since the last mark to phase"""
+        now = time.perf_counter()
+        self._current[self._index[phase]] += (now - self._last) * 1000
+        self._last = now
+
+    def end_frame(self):
+        total = (self._last - self._start) * 1000
+        self.rows.append((self.frame, total, *self._current))
+        self.frame += 1
+        if self.show_overlay and self.frame % self.summary_interval == 0:
+            self._summary = self.summary()
+
+    def summary(self):
+        """Return {phase: (p50, p95, p99)} in milliseconds over the buffered frames"""
+        result = {}
+        for column, name in enumerate(('total',) + self.phases, start=1):
+            values = sorted(row[column] for row in self.rows)
+            result[name] = (percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99))
+        return result
+
+    def draw_overlay(self, surface):
+        """Draw the percentile table in the top-right corner and return its rect"""
+        if not self.show_overlay or not self._summary:
+            return None
+        lines = ["phase       p50    p95    p99"]
+        for name, (p50, p95, p99) in self._summary.items():
+            lines.append(f"{name:<10} {p50:6.2f} {p95:6.2f} {p99:6.2f}")
+        if self._font_name is None:
+            self._font_name = pygame.font.match_font('monospace') or ''
+        width, line_height = 230, 16
+        panel = pygame.Rect(surface.get_width() - width - 10, 10, width, line_height * len(lines) + 8)
+        surface.fill((0, 0, 0), panel)
+        for i, line in enumerate(lines):
+            surface.blit(render_text(line, 18, (200, 255, 200), self._font_name or None),
+                         (panel.left + 4, panel.top + 4 + i * line_height))
+        return panel
+
+    def dump_csv(self, path):
+        """Write the buffered per-frame rows to a CSV file"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('frame', 'total_ms') + tuple(f"{phase}_ms" for phase in self.phases))
+            for row in self.rows:
+                writer.writerow((row[0],) + tuple(f"{value:.4f}" for value in row[1:]))
+
+    def close(self):
+        """Dump to csv_path (if set) at the end of a session"""
+        if self.csv_path:
+            self.dump_csv(self.csv_path)
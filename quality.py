@@ -0,0 +1,65 @@
+# Visual quality levels, from full quality down:
+# (lightning bolt passes, chain-lightning bolts drawn (None = all), rings per freeze field
+#  or explosion, frames between HUD text refreshes)
+QUALITY_LEVELS = (
+    (3, None, 3, 1),
+    (1, 12, 1, 3),
+    (1, 3, 1, 10),
+)
+QUALITY_NAMES = ('high', 'medium', 'low')
+
+
+class QualityGovernor:
+    """Trades visual detail for frame time, driven by measured frame times.
+
+    record() is given the work time of every frame (everything but the
+    wait for the next one) and keeps an exponential moving average of
+    it. When the average goes above high_water of the frame budget the
+    level drops one step; it only rises again after the average has
+    stayed below low_water for recover_frames frames in a row. The gap
+    between the two thresholds, and settle_frames of no changes after
+    each one, keep the quality from flickering between levels.
+    fixed_level pins the quality and turns the governor off.
+    """
+    def __init__(self, budget_ms=1000 / 60, fixed_level=None, high_water=0.85, low_water=0.5,
+                 smoothing=0.1, settle_frames=30, recover_frames=180):
+        self.budget_ms = budget_ms
+        self.fixed_level = fixed_level
+        self.high_water = high_water
+        self.low_water = low_water
+        self.smoothing = smoothing
+        self.settle_frames = settle_frames
+        self.recover_frames = recover_frames
+        self.average_ms = 0.0
+        self.calm_frames = 0  # Frames in a row under low_water
+        self.settling = 0  # Frames left before the level may change again
+        self.changes = 0
+        self.set_level(0 if fixed_level is None else fixed_level)
+
+    def set_level(self, level):
+        """Switch to a QUALITY_LEVELS entry (0 is full quality)"""
+        self.level = level
+        self.bolt_passes, self.max_chain_bolts, self.rings, self.hud_interval = QUALITY_LEVELS[level]
+
+    def record(self, frame_ms):
+        """Account for one frame's work time and adjust the level if needed"""
+        self.average_ms += (frame_ms - self.average_ms) * self.smoothing
+        if self.fixed_level is not None:
+            return
+        if self.average_ms < self.budget_ms * self.low_water:
+            self.calm_frames += 1
+        else:
+            self.calm_frames = 0
+        if self.settling:
+            self.settling -= 1
+            return
+
+        if self.average_ms > self.budget_ms * self.high_water and self.level < len(QUALITY_LEVELS) - 1:
+            self.set_level(self.level + 1)
+        elif self.calm_frames >= self.recover_frames and self.level > 0:
+            self.set_level(self.level - 1)
+        else:
+            return
+        self.changes += 1
+        self.calm_frames = 0
+        self.settling = self.settle_frames
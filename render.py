@@ -0,0 +1,93 @@
+import numpy as np
+import pygame
+
+
+class FullRenderer:
+    """Clear the whole screen every frame and flip it"""
+    def __init__(self, background):
+        self.background = background
+
+    def begin(self, surface):
+        """Clear the surface for a new frame"""
+        surface.fill(self.background)
+
+    def add(self, rect):
+        """Record a drawn region (unused, every frame updates the full screen)"""
+
+    def add_sprites(self, group):
+        """Record the regions of a drawn sprite group (unused)"""
+
+    def add_rects(self, rects):
+        """Record many drawn regions at once (unused)"""
+
+    def invalidate(self):
+        """Force the next frame to redraw everything (always the case here)"""
+
+    def present(self):
+        """Push the frame to the display"""
+        pygame.display.flip()
+
+
+class DirtyRectRenderer:
+    """Clear and update only the regions drawn this frame or the last one.
+
+    Every draw call reports the rect it touched through add() or
+    add_sprites(). The next frame erases those rects back to the
+    background, and present() hands the old and new rects to
+    pygame.display.update() instead of flipping the full surface.
+    """
+    def __init__(self, background, max_rects=400):
+        self.background = background
+        self.max_rects = max_rects  # Above this many regions a full flip is cheaper
+        self.previous = []  # Regions drawn last frame
+        self.current = []  # Regions drawn this frame
+        self.full_redraw = True
+
+    def begin(self, surface):
+        """Erase last frame's regions (or everything after invalidate() or a crowded frame)"""
+        if self.full_redraw or len(self.previous) > self.max_rects:
+            surface.fill(self.background)
+        else:
+            for rect in self.previous:
+                surface.fill(self.background, rect)
+
+    def add(self, rect):
+        """Record a region returned by a blit or pygame.draw call"""
+        if rect:
+            self.current.append(rect)
+
+    def add_sprites(self, group):
+        """Record the current rect of every sprite in a drawn group"""
+        self.current.extend(sprite.rect.copy() for sprite in group)
+
+    def add_rects(self, rects):
+        """Record a batch of (x, y, width, height) regions"""
+        self.current.extend(rects)
+
+    def invalidate(self):
+        """Force the next frame to redraw everything, e.g. after a menu covered the screen"""
+        self.full_redraw = True
+
+    def present(self):
+        """Push only the changed regions to the display"""
+        if self.full_redraw or len(self.previous) + len(self.current) > self.max_rects:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            pygame.display.update(self.previous + self.current)
+        self.previous = self.current
+        self.current = []
+
+
+def blit_centered(surface, images, centers, sizes, renderer):
+    """Blit images[i] centered on centers[i] with a single Surface.blits call.
+
+    centers and sizes are n x 2 arrays. The destinations and the drawn
+    regions are worked out with numpy, and the regions go to the
+    renderer in one add_rects() call instead of one add() per sprite.
+    """
+    if not images:
+        return
+    topleft = np.rint(centers - sizes / 2).astype(int)
+    surface.blits(zip(images, topleft.tolist()), doreturn=0)
+    renderer.add_rects(np.hstack((topleft, sizes)).tolist())
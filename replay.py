@@ -0,0 +1,166 @@
+"""Record a game session's inputs and replay them exactly, as fast as possible.
+
+A recording is a gzip-compressed stream: a header (magic, version, seed,
+enemy damage setting) followed by one tagged record per input the session
+read, in the order it read them:
+
+    C  clock read, as the change from the previous read (int32 ms)
+    I  tick input: held-key bitmask, mouse x/y, quit flag, KEYDOWN keys
+    S  spell chosen at a level-up (index into SPELL_INFO)
+    Q  snapshot loaded by a quickload (F9): length, then the snapshot
+       bytes (length 0 if there was no quicksave to load)
+
+With the same seed, replaying those reads reproduces the session tick
+for tick (a quickload restores the logged snapshot, not whatever the
+quicksave file holds by then), so a reported frame-time spike can be
+profiled offline:
+
+    python spellwalk.py --record session.swr
+    python replay.py session.swr --profile-csv frames.csv
+
+Each game played in one run is recorded separately: the first to
+session.swr, the next ones to session-2.swr, session-3.swr, ...
+"""
+import gzip
+import struct
+
+from game_input import PressedKeys, TickInput
+from spells import SPELL_INFO
+
+MAGIC = b'SWRP'
+VERSION = 3
+HEADER = struct.Struct('<4sBQi')  # magic, version, seed, enemy_dmg
+CLOCK = struct.Struct('<i')
+INPUT = struct.Struct('<HhhBB')  # held-key mask, mouse x, mouse y, quit flag, number of key presses
+KEY = struct.Struct('<I')
+SPELL = struct.Struct('<B')
+LENGTH = struct.Struct('<I')
+SPELLS = list(SPELL_INFO)
+
+
+class InputRecorder:
+    """Writes everything a session reads from its clock, input and spell menu to path"""
+    def __init__(self, path, seed, enemy_dmg):
+        self.path = path
+        self.file = gzip.open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, enemy_dmg))
+        self.last_time = 0
+
+    def record_time(self, current_time):
+        self.file.write(b'C' + CLOCK.pack(current_time - self.last_time))
+        self.last_time = current_time
+
+    def record_input(self, tick_input):
+        x, y = tick_input.mouse_pos
+        presses = tick_input.key_presses
+        self.file.write(b'I' + INPUT.pack(tick_input.keys.mask, x, y, int(tick_input.quit_requested), len(presses)))
+        for key in presses:
+            self.file.write(KEY.pack(key))
+
+    def record_spell(self, spell_name):
+        self.file.write(b'S' + SPELL.pack(SPELLS.index(spell_name)))
+
+    def record_quickload(self, data):
+        """Log the snapshot bytes a quickload restored, or None if it found nothing to load"""
+        data = data or b''
+        self.file.write(b'Q' + LENGTH.pack(len(data)) + data)
+
+    def close(self):
+        self.file.close()
+
+
+class Replay:
+    """Plays a recording back as a session's clock, input source and spell picker.
+
+    Each read must match the next record in the log; a mismatch means the
+    game logic changed since the recording was made and raises ValueError.
+    tick() never waits, so replays run as fast as the game logic allows.
+    """
+    def __init__(self, path):
+        with gzip.open(path, 'rb') as f:
+            self.data = f.read()
+        magic, version, self.seed, self.enemy_dmg = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} Spellwalk recording")
+        self.offset = HEADER.size
+        self.time = 0
+
+    def finished(self):
+        """True once every record has been played"""
+        return self.offset >= len(self.data)
+
+    def _expect(self, tag, record):
+        if self.data[self.offset:self.offset + 1] != tag:
+            raise ValueError(f"replay diverged at byte {self.offset}: expected a {tag.decode()} record")
+        values = record.unpack_from(self.data, self.offset + 1)
+        self.offset += 1 + record.size
+        return values
+
+    def get_ticks(self):
+        if self.finished():
+            return self.time
+        delta, = self._expect(b'C', CLOCK)
+        self.time += delta
+        return self.time
+
+    def tick(self):
+        return 0
+
+    def poll(self):
+        mask, x, y, quit_requested, count = self._expect(b'I', INPUT)
+        key_presses = [self._expect_key() for _ in range(count)]
+        return TickInput(PressedKeys(mask), (x, y), key_presses, bool(quit_requested))
+
+    def _expect_key(self):
+        key, = KEY.unpack_from(self.data, self.offset)
+        self.offset += KEY.size
+        return key
+
+    def quickload(self):
+        """The snapshot bytes the recorded session quickloaded, or None"""
+        length, = self._expect(b'Q', LENGTH)
+        data = self.data[self.offset:self.offset + length]
+        self.offset += length
+        return data or None
+
+    def pick_spell(self, spell_manager):
+        index, = self._expect(b'S', SPELL)
+        return SPELLS[index]
+
+
+def main():
+    import argparse
+    import os
+
+    # Replays need no window
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import spellwalk
+    from profiler import FrameProfiler
+
+    parser = argparse.ArgumentParser(description="Replay a recorded Spellwalk session")
+    parser.add_argument("path", help="recording made with spellwalk.py --record")
+    parser.add_argument("--render", action="store_true", help="also draw every frame to the (dummy) display")
+    parser.add_argument("--profile-csv", help="write per-frame phase timings to this CSV file")
+    parser.add_argument("--slowest", type=int, default=5, help="number of slowest ticks to list")
+    args = parser.parse_args()
+
+    replay = Replay(args.path)
+    spellwalk.enemy_dmg = replay.enemy_dmg
+    profiler = FrameProfiler(capacity=None, csv_path=args.profile_csv)  # Keep every tick
+    session = spellwalk.GameSession(replay, headless=not args.render, spell_picker=replay.pick_spell,
+                                    profiler=profiler, seed=replay.seed, input_source=replay)
+    while session.running and not replay.finished():
+        session.tick()
+    stats = session.finish()
+
+    print(f"replayed {stats['ticks']} ticks ({stats['sim_ms'] / 1000:.1f}s of play) "
+          f"at {stats['ticks_per_second']:.0f} ticks/s: level {stats['level']}, wave {stats['wave']}")
+    for row in sorted(profiler.rows, key=lambda row: row[1], reverse=True)[:args.slowest]:
+        phases = sorted(zip(profiler.phases, row[2:]), key=lambda item: item[1], reverse=True)
+        worst = ", ".join(f"{phase} {ms:.2f}ms" for phase, ms in phases[:3])
+        print(f"  tick {row[0]}: {row[1]:.2f}ms ({worst})")
+
+
+if __name__ == "__main__":
+    main()
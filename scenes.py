@@ -0,0 +1,96 @@
+# Transitions a Scene.frame() returns as (action, value); None stays on the current scene
+SWITCH = 'switch'  # Replace the current scene with value
+PUSH = 'push'  # Put value on top; the current scene resumes when it pops
+POP = 'pop'  # Leave the current scene, handing value back (see run_modal())
+QUIT = 'quit'  # Leave every scene
+
+
+class Scene:
+    """One screen of the game.
+
+    enter() and exit() bracket the scene's time on the stack, so anything
+    it builds in enter() (sessions, widgets, sprite groups) can be torn
+    down in exit(). resume() runs when a scene pushed on top of it pops.
+    """
+    def enter(self):
+        pass
+
+    def frame(self):
+        """Run one frame and return a transition, or None to stay"""
+        return None
+
+    def resume(self):
+        pass
+
+    def exit(self):
+        pass
+
+
+class SceneManager:
+    """Runs a stack of scenes from one flat loop.
+
+    The top scene gets one frame() per iteration and the transition it
+    returns is applied before the next one, so going from the menu to a
+    game and back does not nest calls, and each scene's exit() runs
+    before the scene that replaces it enters.
+    """
+    def __init__(self):
+        self.stack = []
+
+    def run(self, scene):
+        """Run scene, and whatever it leads to, until a scene quits or the stack empties"""
+        self.stack.append(scene)
+        scene.enter()
+        try:
+            while self.stack:
+                transition = self.stack[-1].frame()
+                if transition is not None:
+                    self.apply(*transition)
+        finally:
+            self.exit_all()
+
+    def apply(self, action, value):
+        """Carry out one transition returned by the top scene"""
+        stack = self.stack
+        if action == SWITCH:
+            stack.pop().exit()
+            stack.append(value)
+            value.enter()
+        elif action == PUSH:
+            stack.append(value)
+            value.enter()
+        elif action == POP:
+            stack.pop().exit()
+            if stack:
+                stack[-1].resume()
+        elif action == QUIT:
+            self.exit_all()
+        else:
+            raise ValueError(f"unknown scene transition {action!r}")
+
+    def exit_all(self):
+        """Exit every scene on the stack, top first"""
+        while self.stack:
+            self.stack.pop().exit()
+
+
+def run_modal(scene):
+    """Run scene on its own until it pops, and return the value it pops with (None if it quits).
+
+    For screens whose answer is needed in the middle of a frame, like the
+    spell choice during a simulation step.
+    """
+    scene.enter()
+    try:
+        while True:
+            transition = scene.frame()
+            if transition is None:
+                continue
+            action, value = transition
+            if action == POP:
+                return value
+            if action == QUIT:
+                return None
+            raise ValueError(f"modal scenes can only pop or quit, not {action!r}")
+    finally:
+        scene.exit()
@@ -0,0 +1,76 @@
+import heapq
+import itertools
+
+
+class Timer:
+    """Handle for a scheduled callback (cancel() stops it from firing again)"""
+    __slots__ = ('due', 'interval', 'callback', 'args', 'cancelled')
+
+    def __init__(self, due, interval, callback, args):
+        self.due = due
+        self.interval = interval  # None for one-shot timers
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """Heap of timed callbacks driven by the game clock.
+
+    run_until(current_time) fires every callback due at or before
+    current_time in time order, so its cost follows the number of due
+    events rather than the number of live timers. Cancelling is lazy: a
+    cancelled timer stays in the heap and is dropped when it comes due.
+    """
+    def __init__(self, current_time=0):
+        self.now = current_time
+        self._heap = []  # (due, seq, timer)
+        self._seq = itertools.count()  # Tie-breaker so timers due together fire in schedule order
+
+    def call_at(self, due, callback, *args):
+        """Call callback(*args) once at game time due"""
+        return self._push(Timer(due, None, callback, args))
+
+    def call_later(self, delay, callback, *args):
+        """Call callback(*args) once, delay milliseconds from now"""
+        return self.call_at(self.now + delay, callback, *args)
+
+    def call_every(self, interval, callback, *args, start=None):
+        """Call callback(*args) every interval milliseconds, first at start (default now + interval)"""
+        if start is None:
+            start = self.now + interval
+        return self._push(Timer(start, interval, callback, args))
+
+    def _push(self, timer):
+        heapq.heappush(self._heap, (timer.due, next(self._seq), timer))
+        return timer
+
+    def run_until(self, current_time):
+        """Fire every timer due at or before current_time"""
+        heap = self._heap
+        while heap and heap[0][0] <= current_time:
+            due, _, timer = heapq.heappop(heap)
+            if timer.cancelled:
+                continue
+            self.now = due
+            if timer.interval is not None:
+                timer.due = due + timer.interval
+                self._push(timer)
+            timer.callback(*timer.args)
+        self.now = current_time
+
+    def pending(self):
+        """Live timers in the order they will fire"""
+        return [timer for _, _, timer in sorted(self._heap) if not timer.cancelled]
+
+    def clear(self):
+        """Drop every pending timer"""
+        for _, _, timer in self._heap:
+            timer.cancel()
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
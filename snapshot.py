@@ -0,0 +1,453 @@
+"""Compact binary snapshots of a GameSession, for rewind, save/load and crash dumps.
+
+A snapshot packs the session's state into fixed structs and raw NumPy
+arrays instead of pickling the sprite graph: enemies are copied straight
+out of the EnemyStore arrays, and everything that points at a sprite
+(lightning hits, freeze fields, slows) refers to enemies by store row.
+All times are stored relative to the game time the snapshot was taken
+at, so a snapshot can be restored into a session whose clock has moved
+on (the real clock never runs backwards).
+
+Layout, all little-endian, in this order:
+
+    header     magic, version
+    session    clock offset, EXP, level, wave, spell menu and spawn-rate
+               levels, game over flag, player float position and health, mouse
+    level times, RNG state
+    spells     combo state, last key time, level and unlock order per spell
+    timers     spawners, the automatic projectile and spell cooldowns,
+               in the order the scheduler will fire them
+    enemies    type, group order, rect, float position, health, speed
+               multiplier (one array each)
+    projectiles, spell effects (with hit lists), freeze slows
+
+    python snapshot.py crash.swsn   # Summarize a crash dump or quicksave
+"""
+import gzip
+import random
+import struct
+from collections import deque
+
+import numpy as np
+
+from spells import SPELL_INFO, LightningSpell, FireballSpell, FireballExplosion, FreezeSpell
+
+MAGIC = b'SWSN'
+VERSION = 3
+HEADER = struct.Struct('<4sB')
+# clock offset, unrounded game time offset, exp, level, wave, last spell selection level,
+# last spawn update level, game over, player x, y and health, mouse x and y
+SESSION = struct.Struct('<idIHHHHBdddhh')
+COUNT = struct.Struct('<I')
+GAUSS = struct.Struct('<Bd')  # has gauss_next, gauss_next
+SPELL_STATE = struct.Struct('<Hi')  # combo state, last key time
+SPELL_LEVEL = struct.Struct('<Bb')  # level, position in unlocked_spells (-1 if locked)
+TIMER = struct.Struct('<BBIi')  # kind, spell index, interval (0 for one-shot), due
+# kind, upgrade level, chain flag, four coordinates, creation time, next damage tick,
+# number of path points, number of hit enemies
+EFFECT = struct.Struct('<BBBddddiiBI')
+SPELLS = list(SPELL_INFO)
+RNG_WORDS = 625  # Length of the Mersenne Twister state tuple
+
+# Timer kinds
+ENEMY_SPAWNER, TANK_SPAWNER, FIRE_TIMER, COOLDOWN = range(4)
+# Effect kinds
+LIGHTNING, FIREBALL, EXPLOSION, FREEZE = range(4)
+
+_PLACEMENT_RNG = random.Random(0)  # Spawn positions drawn by restored enemies are overwritten anyway
+
+
+def _array(parts, values, dtype):
+    parts.append(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+
+def capture(session):
+    """Return the state of session as snapshot bytes"""
+    now = session.current_time
+    player = session.player
+    spell_manager = session.spell_manager
+    enemies = session.enemies
+    store = enemies.store
+    parts = [HEADER.pack(MAGIC, VERSION)]
+
+    parts.append(SESSION.pack(
+        session.timer - now, session.sim_time - now, session.exp, session.level, session.wave,
+        session.last_spell_selection_level, session.last_level_for_spawn_update, int(session.game_over),
+        *player.pos, player.health, *session.mouse_pos))
+    parts.append(COUNT.pack(len(session.level_times)))
+    _array(parts, session.level_times, '<i8')
+    _, words, gauss_next = session.rng.getstate()
+    _array(parts, words, '<u4')
+    parts.append(GAUSS.pack(gauss_next is not None, gauss_next or 0.0))
+
+    # Spell manager
+    parts.append(SPELL_STATE.pack(spell_manager.combo_state, spell_manager.last_key_time - now))
+    for name in SPELLS:
+        order = spell_manager.unlocked_spells.index(name) if name in spell_manager.unlocked_spells else -1
+        parts.append(SPELL_LEVEL.pack(spell_manager.spell_levels[name], order))
+
+    # Session timers (effect timers are recreated with their effects)
+    timers = []
+    for timer in session.scheduler.pending():
+        if timer is session.enemy_spawner:
+            timers.append(TIMER.pack(ENEMY_SPAWNER, 0, timer.interval, timer.due - now))
+        elif timer is session.tank_spawner:
+            timers.append(TIMER.pack(TANK_SPAWNER, 0, timer.interval, timer.due - now))
+        elif timer is session.fire_timer:
+            timers.append(TIMER.pack(FIRE_TIMER, 0, timer.interval, timer.due - now))
+        elif timer.callback == spell_manager.cooldowns.pop:
+            timers.append(TIMER.pack(COOLDOWN, SPELLS.index(timer.args[0]), 0, timer.due - now))
+    parts.append(COUNT.pack(len(timers)))
+    parts.extend(timers)
+
+    # Enemies, in store row order
+    n = store.count
+    enemy_types = session.enemy_types
+    rows = {sprite.uid: row for row, sprite in enumerate(store.sprites)}
+    parts.append(COUNT.pack(n))
+    _array(parts, [enemy_types.index(type(sprite)) for sprite in store.sprites], 'u1')
+    _array(parts, [sprite.slot for sprite in enemies], '<i4')  # Group iteration order
+    _array(parts, [sprite.rect.center for sprite in store.sprites], '<i4')
+    _array(parts, store.pos[:n], '<f8')
+    _array(parts, store.health[:n], '<i4')
+    _array(parts, store.speed_multiplier[:n], '<f8')
+
+    # Projectiles
+    projectiles = session.projectiles.sprites()
+    parts.append(COUNT.pack(len(projectiles)))
+    _array(parts, [p.pos for p in projectiles], '<f8')
+    _array(parts, [p.direction for p in projectiles], '<f8')
+    _array(parts, [p.rect.width for p in projectiles], '<u2')
+
+    # Spell effects
+    effects = session.spell_effects.sprites()
+    parts.append(COUNT.pack(len(effects)))
+    for effect in effects:
+        points = ()
+        next_tick = 0
+        if isinstance(effect, LightningSpell):
+            kind, hits = LIGHTNING, effect.hit_enemies
+            coords = (*effect.start_pos, *effect.target_pos)
+            points = [start for start, _ in effect.segments] + [effect.segments[-1][1]]
+        elif isinstance(effect, FireballSpell):
+            kind, hits = FIREBALL, effect.hit_enemies
+            coords = (*effect.pos, *effect.direction)
+        elif isinstance(effect, FireballExplosion):
+            kind, hits = EXPLOSION, ()
+            coords = (*effect.center_pos, 0, 0)
+            damage_timers = session.spell_effects.timers[effect][1:]
+            if damage_timers:
+                next_tick = damage_timers[0].due - now
+        else:
+            kind, hits = FREEZE, effect.affected_enemies
+            coords = (*effect.center_pos, 0, 0)
+        hit_rows = sorted(rows[uid] for uid in hits if uid in rows)  # Enemies that died since don't matter
+        parts.append(EFFECT.pack(kind, effect.upgrade_level, int(getattr(effect, 'is_chain', False)), *coords,
+                                 effect.creation_time - now, next_tick, len(points), len(hit_rows)))
+        _array(parts, points, '<f8')
+        _array(parts, hit_rows, '<i4')
+
+    # Slows on live enemies; a source is an effect index, or negative for a freeze field that already expired
+    effect_index = {effect: i for i, effect in enumerate(effects)}
+    expired = {}
+    slows = []
+    for uid, active in session.status_effects.slows.items():
+        row = rows.get(uid)
+        if row is None:
+            continue
+        for source, (multiplier, expires_at) in active.items():
+            index = effect_index.get(source)
+            if index is None:
+                index = expired.setdefault(source, -1 - len(expired))
+            slows.append((row, index, multiplier, expires_at - now))
+    parts.append(COUNT.pack(len(slows)))
+    _array(parts, [row for row, _, _, _ in slows], '<i4')
+    _array(parts, [index for _, index, _, _ in slows], '<i4')
+    _array(parts, [multiplier for _, _, multiplier, _ in slows], '<f8')
+    _array(parts, [expires for _, _, _, expires in slows], '<i4')
+    return b''.join(parts)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, record):
+        values = record.unpack_from(self.data, self.offset)
+        self.offset += record.size
+        return values
+
+    def count(self):
+        return self.unpack(COUNT)[0]
+
+    def array(self, dtype, count, width=None):
+        dtype = np.dtype(dtype)
+        items = count if width is None else count * width
+        array = np.frombuffer(self.data, dtype=dtype, count=items, offset=self.offset)
+        self.offset += array.nbytes
+        return array if width is None else array.reshape(count, width)
+
+
+def decode(data):
+    """Unpack snapshot bytes into a dict of plain values and arrays"""
+    reader = _Reader(data)
+    magic, version = reader.unpack(HEADER)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} Spellwalk snapshot")
+    state = dict(zip(
+        ('timer', 'sim_time', 'exp', 'level', 'wave', 'last_spell_selection_level', 'last_level_for_spawn_update',
+         'game_over', 'player_x', 'player_y', 'player_health', 'mouse_x', 'mouse_y'),
+        reader.unpack(SESSION)))
+    state['level_times'] = reader.array('<i8', reader.count()).tolist()
+    words = tuple(reader.array('<u4', RNG_WORDS).tolist())
+    has_gauss, gauss_next = reader.unpack(GAUSS)
+    state['rng'] = (3, words, gauss_next if has_gauss else None)
+
+    state['combo_state'], state['last_key_time'] = reader.unpack(SPELL_STATE)
+    state['spells'] = [reader.unpack(SPELL_LEVEL) for _ in SPELLS]
+    state['timers'] = [reader.unpack(TIMER) for _ in range(reader.count())]
+
+    n = reader.count()
+    state['enemies'] = {
+        'types': reader.array('u1', n),
+        'order': reader.array('<i4', n),
+        'centers': reader.array('<i4', n, 2),
+        'pos': reader.array('<f8', n, 2),
+        'health': reader.array('<i4', n),
+        'speed_multiplier': reader.array('<f8', n),
+    }
+
+    n = reader.count()
+    state['projectiles'] = {
+        'pos': reader.array('<f8', n, 2),
+        'direction': reader.array('<f8', n, 2),
+        'size': reader.array('<u2', n),
+    }
+
+    effects = []
+    for _ in range(reader.count()):
+        kind, level, is_chain, a, b, c, d, created, next_tick, point_count, hit_count = reader.unpack(EFFECT)
+        points = [tuple(point) for point in reader.array('<f8', point_count, 2).tolist()]
+        hits = reader.array('<i4', hit_count).tolist()
+        effects.append((kind, level, bool(is_chain), (a, b), (c, d), created, next_tick, points, hits))
+    state['effects'] = effects
+
+    n = reader.count()
+    state['slows'] = list(zip(reader.array('<i4', n).tolist(), reader.array('<i4', n).tolist(),
+                              reader.array('<f8', n).tolist(), reader.array('<i4', n).tolist()))
+    return state
+
+
+def restore(session, data, current_time=None):
+    """Replace the state of session with a snapshot, as of game time current_time.
+
+    current_time defaults to the session's current time. The session's
+    groups, store, scheduler and managers are refilled in place, so a
+    restore can happen in the middle of a simulation step.
+    """
+    state = decode(data)
+    now = session.current_time if current_time is None else current_time
+    scheduler = session.scheduler
+    spell_manager = session.spell_manager
+    spell_effects = session.spell_effects
+    enemies = session.enemies
+    player = session.player
+
+    for group in (spell_effects, enemies, session.projectiles):
+        for sprite in group.sprites():
+            sprite.kill()  # Back to their pools; effects cancel their own timers
+    scheduler.clear()
+    scheduler.now = now
+
+    # Session and player
+    session.current_time = now
+    session.sim_time = now + state['sim_time']
+    session.timer = now + state['timer']
+    session.exp = state['exp']
+    session.level = state['level']
+    session.wave = state['wave']
+    session.last_spell_selection_level = state['last_spell_selection_level']
+    session.last_level_for_spawn_update = state['last_level_for_spawn_update']
+    session.game_over = bool(state['game_over'])
+    if session.game_over:
+        session.running = False
+    session.level_times = state['level_times']
+    session.mouse_pos = (state['mouse_x'], state['mouse_y'])
+    session.rng.setstate(state['rng'])
+    player.pos = [state['player_x'], state['player_y']]
+    player.prev_pos = tuple(player.pos)
+    player.rect.center = (round(player.pos[0]), round(player.pos[1]))
+    player.health = state['player_health']
+
+    # Spell manager
+    spell_manager.combo_state = state['combo_state']
+    spell_manager.last_key_time = now + state['last_key_time']
+    unlocked = []
+    for name, (level, order) in zip(SPELLS, state['spells']):
+        spell_manager.spell_levels[name] = level
+        if order >= 0:
+            unlocked.append((order, name))
+    spell_manager.unlocked_spells = [name for _, name in sorted(unlocked)]
+    spell_manager.cooldowns.clear()
+
+    # Timers, recreated in their original firing order
+    for kind, spell_index, interval, due in state['timers']:
+        due += now
+        if kind == ENEMY_SPAWNER:
+            session.enemy_spawner = scheduler.call_every(interval, session.spawn_enemy, session.enemy_types[0], start=due)
+        elif kind == TANK_SPAWNER:
+            session.tank_spawner = scheduler.call_every(interval, session.spawn_enemy, session.enemy_types[1], start=due)
+        elif kind == FIRE_TIMER:
+            session.fire_timer = scheduler.call_every(interval, session.fire_projectile, start=due)
+        else:
+            name = SPELLS[spell_index]
+            spell_manager.cooldowns[name] = due
+            scheduler.call_at(due, spell_manager.cooldowns.pop, name, None)
+
+    # Enemies: add in group order, then put the store rows back in their saved order
+    saved = state['enemies']
+    n = len(saved['types'])
+    by_row = []
+    for type_index, center in zip(saved['types'].tolist(), saved['centers'].tolist()):
+        enemy = session.enemy_types[type_index].pool.acquire(player, _PLACEMENT_RNG)
+        enemy.rect.center = center
+        by_row.append(enemy)
+    enemies.add(*[by_row[row] for row in saved['order'].tolist()])
+    store = enemies.store
+    store.reorder(by_row)
+
+    # Projectiles
+    saved = state['projectiles']
+    projectile_type = session.projectile_type
+    for pos, direction, size in zip(saved['pos'].tolist(), saved['direction'].tolist(), saved['size'].tolist()):
+        projectile = projectile_type.pool.acquire((0, 0), tuple(direction), size)
+        projectile.pos = projectile.prev_pos = tuple(pos)
+        projectile.rect.center = (round(pos[0]), round(pos[1]))
+        session.projectiles.add(projectile)
+
+    # Spell effects, in group order (adding one schedules its expiry)
+    effects = []
+    for kind, level, is_chain, first, second, created, next_tick, points, hits in state['effects']:
+        created += now
+        uids = {by_row[row].uid for row in hits}
+        if kind == LIGHTNING:
+            segments = list(zip(points, points[1:]))
+            effect = LightningSpell(first, second, level, is_chain, created, segments=segments)
+            effect.hit_enemies = uids
+            spell_effects.add(effect)
+        elif kind == FIREBALL:
+            effect = FireballSpell.pool.acquire((0, 0), second, level, created)
+            effect.pos = effect.prev_pos = first
+            effect.rect.center = (round(first[0]), round(first[1]))
+            effect.hit_enemies = uids
+            spell_effects.add(effect)
+        elif kind == EXPLOSION:
+            effect = FireballExplosion((int(first[0]), int(first[1])), level, created)
+            spell_effects.add(effect)
+            spell_effects.call_every(effect, effect.tick_rate, session.explosion_damage, effect, start=now + next_tick)
+        else:
+            effect = FreezeSpell((int(first[0]), int(first[1])), level, created)
+            effect.affected_enemies = uids
+            spell_effects.add(effect)
+        effects.append(effect)
+
+    # Slows (before the speed multipliers, which apply_slow would otherwise recompute)
+    status_effects = session.status_effects
+    status_effects.clear()
+    expired = {}
+    for row, index, multiplier, expires_at in state['slows']:
+        source = effects[index] if index >= 0 else expired.setdefault(index, object())
+        status_effects.apply_slow(by_row[row], multiplier, source, now + expires_at)
+
+    saved = state['enemies']
+    store.pos[:n] = saved['pos']
+    store.health[:n] = saved['health']
+    store.speed_multiplier[:n] = saved['speed_multiplier']
+    store.prev_pos[:n] = saved['pos']
+    session.enemy_grid.rebuild(enemies)
+
+
+def write(path, data):
+    """Write snapshot bytes to a compressed file"""
+    with gzip.open(path, 'wb') as f:
+        f.write(data)
+
+
+def read(path):
+    """Read snapshot bytes written by write()"""
+    with gzip.open(path, 'rb') as f:
+        return f.read()
+
+
+def save(session, path):
+    """Save the state of session to path"""
+    write(path, capture(session))
+
+
+def load(session, path):
+    """Restore the state of session from a file written by save()"""
+    restore(session, read(path))
+
+
+class RewindBuffer:
+    """Ring buffer of the session's most recent snapshots.
+
+    record() is called once per simulation step and takes a snapshot
+    every interval steps; the oldest snapshot is dropped once capacity
+    are held.
+    """
+    def __init__(self, capacity=300, interval=6):
+        self.snapshots = deque(maxlen=capacity)
+        self.interval = interval
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    @property
+    def nbytes(self):
+        """Total size of the buffered snapshots"""
+        return sum(len(data) for data in self.snapshots)
+
+    def record(self, session):
+        if session.ticks % self.interval == 0:
+            self.snapshots.append(capture(session))
+
+    def rewind(self, session, steps=1):
+        """Go back steps snapshots (dropping the newer ones) and return True, or False if empty"""
+        if not self.snapshots:
+            return False
+        for _ in range(min(steps, len(self.snapshots)) - 1):
+            self.snapshots.pop()
+        restore(session, self.snapshots.pop())
+        return True
+
+    def dump(self, path):
+        """Write the newest snapshot to path and return True, or False if empty"""
+        if not self.snapshots:
+            return False
+        write(path, self.snapshots[-1])
+        return True
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize a Spellwalk snapshot (quicksave or crash dump)")
+    parser.add_argument("path", help="snapshot file")
+    args = parser.parse_args()
+
+    data = read(args.path)
+    state = decode(data)
+    enemy_counts = np.bincount(state['enemies']['types'], minlength=3).tolist()
+    print(f"{args.path}: {len(data)} bytes, {-state['timer'] / 1000:.1f}s into the session")
+    print(f"  level {state['level']} ({state['exp']} EXP), wave {state['wave']}, "
+          f"player health {state['player_health']:g}{' (game over)' if state['game_over'] else ''}")
+    print(f"  enemies {sum(enemy_counts)} (regular/tank/boss {'/'.join(map(str, enemy_counts))}), "
+          f"projectiles {len(state['projectiles']['size'])}, spell effects {len(state['effects'])}")
+    levels = ", ".join(f"{name} {level}" for name, (level, _) in zip(SPELLS, state['spells']) if level)
+    print(f"  spells: {levels or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
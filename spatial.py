@@ -0,0 +1,100 @@
+import heapq
+import math
+
+DEFAULT_CELL_SIZE = 64
+
+
+class SpatialHash:
+    """Uniform grid of sprites bucketed by their rect center.
+
+    Rebuild once per tick after movement; queries then only look at the
+    cells that overlap the query area instead of every sprite.
+    """
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (cell_x, cell_y): [sprite, ...]
+
+    def rebuild(self, sprites):
+        """Re-bucket all sprites at their current positions"""
+        self.cells = {}
+        size = self.cell_size
+        for sprite in sprites:
+            x, y = sprite.rect.center
+            key = (int(x // size), int(y // size))
+            bucket = self.cells.get(key)
+            if bucket is None:
+                self.cells[key] = [sprite]
+            else:
+                bucket.append(sprite)
+
+    def _cells_in_box(self, left, top, right, bottom):
+        """Yield the buckets overlapping a bounding box"""
+        size = self.cell_size
+        cells = self.cells
+        for cx in range(int(left // size), int(right // size) + 1):
+            for cy in range(int(top // size), int(bottom // size) + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    yield bucket
+
+    def query_radius(self, pos, radius):
+        """Return live sprites whose center is within radius of pos"""
+        px, py = pos
+        radius_sq = radius * radius
+        found = []
+        for bucket in self._cells_in_box(px - radius, py - radius, px + radius, py + radius):
+            for sprite in bucket:
+                x, y = sprite.rect.center
+                dx = x - px
+                dy = y - py
+                if dx * dx + dy * dy <= radius_sq and sprite.alive():
+                    found.append(sprite)
+        return found
+
+    def query_segment(self, start, end, width):
+        """Return live sprites whose center is closer than width to the segment start-end"""
+        x1, y1 = start
+        x2, y2 = end
+        dx = x2 - x1
+        dy = y2 - y1
+        length_sq = dx * dx + dy * dy
+        width_sq = width * width
+        found = []
+        for bucket in self._cells_in_box(min(x1, x2) - width, min(y1, y2) - width,
+                                         max(x1, x2) + width, max(y1, y2) + width):
+            for sprite in bucket:
+                px, py = sprite.rect.center
+                if length_sq == 0:
+                    t = 0
+                else:
+                    t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / length_sq))
+                ex = px - (x1 + t * dx)
+                ey = py - (y1 + t * dy)
+                if ex * ex + ey * ey < width_sq and sprite.alive():
+                    found.append(sprite)
+        return found
+
+    def query_path(self, segments, width):
+        """Return live sprites near any segment of a path, each sprite once"""
+        found = {}
+        for start, end in segments:
+            for sprite in self.query_segment(start, end, width):
+                found[sprite] = None
+        return list(found)
+
+    def nearest(self, pos, k, max_distance, exclude=None, skip=None):
+        """Return up to k (distance, sprite) pairs closer than max_distance to pos, nearest first.
+
+        exclude is a sprite to leave out; skip, if given, leaves out every
+        sprite for which skip(sprite) is true.
+        """
+        px, py = pos
+        candidates = []
+        for sprite in self.query_radius(pos, max_distance):
+            if sprite is exclude or (skip is not None and skip(sprite)):
+                continue
+            x, y = sprite.rect.center
+            dist = math.hypot(x - px, y - py)
+            if dist < max_distance:
+                candidates.append((dist, sprite))
+        return heapq.nsmallest(k, candidates, key=lambda pair: pair[0])
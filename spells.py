@@ -1,6 +1,8 @@
 import pygame
 import math
 import random
+from combos import ComboAutomaton
+from pool import Pool, PooledSprite, blank_surface, cached_surface
 
 # Colors for spell effects
 YELLOW = (255, 255, 0)
@@ -10,25 +12,62 @@ BLUE = (0, 150, 255)
 ORANGE = (255, 165, 0)
 BRIGHT_ORANGE = (255, 200, 100)
 
-# Spell constants
+# Spell constants (the *_PER_LEVEL values are added for each upgrade level above the first)
 LIGHTNING_DAMAGE = 5
+LIGHTNING_DAMAGE_PER_LEVEL = 3
 LIGHTNING_RANGE = 200
 LIGHTNING_COOLDOWN = 5000  # 5 seconds in milliseconds
+LIGHTNING_HIT_RADIUS = 30  # Distance from a bolt segment that counts as a hit
 
 FIREBALL_DAMAGE = 8
+FIREBALL_DAMAGE_PER_LEVEL = 4
 FIREBALL_SPEED = 5
+FIREBALL_SPEED_PER_LEVEL = 0.5
+FIREBALL_SIZE = 40
+FIREBALL_SIZE_PER_LEVEL = 10
+FIREBALL_LIFETIME = 3000  # 3 seconds
+FIREBALL_LIFETIME_PER_LEVEL = 1000
 FIREBALL_COOLDOWN = 3000  # 3 seconds
 
+# Explosions start at fireball level 2, so their scaling counts from level 2
+EXPLOSION_RADIUS = 80
+EXPLOSION_RADIUS_PER_LEVEL = 20
+EXPLOSION_DURATION = 2000  # 2 seconds
+EXPLOSION_DURATION_PER_LEVEL = 500
+EXPLOSION_DAMAGE = 1  # Damage per damage tick
+EXPLOSION_TICK_RATE = 500  # Damage every 0.5 seconds
+
 FREEZE_DURATION = 3000  # 3 seconds
+FREEZE_DURATION_PER_LEVEL = 1000
 FREEZE_RADIUS = 150
+FREEZE_RADIUS_PER_LEVEL = 50
+FREEZE_SLOW = 0.3  # Speed multiplier inside a freeze field
+FREEZE_SLOW_PER_LEVEL = -0.05  # Slows more per level
+FREEZE_MIN_SLOW = 0.1
 FREEZE_COOLDOWN = 8000  # 8 seconds
 
+PULSE_FRAMES = 16  # Pre-rendered steps per pulse of the freeze and explosion rings
+
+# Key sequence for each spell; a combo completes whenever the last keys pressed match it
+COMBOS = {
+    'lightning': (pygame.K_q, pygame.K_w, pygame.K_e, pygame.K_r),
+    'fireball': (pygame.K_e, pygame.K_r, pygame.K_f),
+    'freeze': (pygame.K_i, pygame.K_c, pygame.K_e),
+}
+COMBO_AUTOMATON = ComboAutomaton(COMBOS)
+
+SPELL_COOLDOWNS = {
+    'lightning': LIGHTNING_COOLDOWN,
+    'fireball': FIREBALL_COOLDOWN,
+    'freeze': FREEZE_COOLDOWN,
+}
+
 class SpellManager:
-    def __init__(self):
-        self.combo_buffer = []
+    def __init__(self, scheduler):
+        self.scheduler = scheduler  # Ends cooldowns when they expire
+        self.combo_state = COMBO_AUTOMATON.ROOT  # Position in COMBO_AUTOMATON
         self.combo_timeout = 1000  # 1 second to complete combo
         self.last_key_time = 0
-        self.last_update_time = pygame.time.get_ticks()
         
         # Available spells (unlocked when selected)
         self.unlocked_spells = []
@@ -40,36 +79,30 @@ class SpellManager:
             'freeze': 0
         }
         
-        # Cooldowns
-        self.lightning_cooldown = 0
-        self.fireball_cooldown = 0
-        self.freeze_cooldown = 0
+        # Time each spell on cooldown becomes ready (removed by the scheduler)
+        self.cooldowns = {}
         
     def update(self, current_time):
-        # Calculate time delta
-        delta = current_time - self.last_update_time
-        self.last_update_time = current_time
-        
-        # Clear combo buffer if timeout exceeded
+        # Reset the combo if timeout exceeded
         if current_time - self.last_key_time > self.combo_timeout:
-            self.combo_buffer = []
-        
-        # Update cooldowns
-        if self.lightning_cooldown > 0:
-            self.lightning_cooldown = max(0, self.lightning_cooldown - delta)
-        if self.fireball_cooldown > 0:
-            self.fireball_cooldown = max(0, self.fireball_cooldown - delta)
-        if self.freeze_cooldown > 0:
-            self.freeze_cooldown = max(0, self.freeze_cooldown - delta)
+            self.combo_state = COMBO_AUTOMATON.ROOT
     
     def add_key_to_combo(self, key, current_time):
-        """Add a key press to the combo buffer"""
+        """Advance the combo by one key press and return the spell it casts, or None"""
+        if current_time - self.last_key_time > self.combo_timeout:
+            self.combo_state = COMBO_AUTOMATON.ROOT
         self.last_key_time = current_time
-        self.combo_buffer.append(key)
-        
-        # Keep only last 4 keys
-        if len(self.combo_buffer) > 4:
-            self.combo_buffer.pop(0)
+        self.combo_state = COMBO_AUTOMATON.step(self.combo_state, key)
+        
+        # First completed combo (in COMBOS order) that is unlocked and off cooldown
+        for spell_name in COMBO_AUTOMATON.matches[self.combo_state]:
+            if spell_name in self.unlocked_spells and spell_name not in self.cooldowns:
+                self.combo_state = COMBO_AUTOMATON.ROOT
+                ready_at = current_time + SPELL_COOLDOWNS[spell_name]
+                self.cooldowns[spell_name] = ready_at
+                self.scheduler.call_at(ready_at, self.cooldowns.pop, spell_name, None)
+                return spell_name
+        return None
     
     def unlock_spell(self, spell_name):
         """Unlock a spell for use or upgrade it"""
@@ -82,68 +115,110 @@ class SpellManager:
         """Get the upgrade level of a spell"""
         return self.spell_levels.get(spell_name, 0)
     
-    def check_lightning_combo(self, current_time):
-        """Check if lightning spell combo is complete (Q -> W -> E -> R)"""
-        if 'lightning' not in self.unlocked_spells or self.lightning_cooldown > 0:
-            return False
-        
-        combo = [pygame.K_q, pygame.K_w, pygame.K_e, pygame.K_r]
-        if self.combo_buffer == combo:
-            self.combo_buffer = []
-            self.lightning_cooldown = LIGHTNING_COOLDOWN
-            return True
-        return False
-    
-    def check_fireball_combo(self, current_time):
-        """Check if fireball spell combo is complete (E -> R -> F)"""
-        if 'fireball' not in self.unlocked_spells or self.fireball_cooldown > 0:
-            return False
-        
-        combo = [pygame.K_e, pygame.K_r, pygame.K_f]
-        if len(self.combo_buffer) >= 3 and self.combo_buffer[-3:] == combo:
-            self.combo_buffer = []
-            self.fireball_cooldown = FIREBALL_COOLDOWN
-            return True
-        return False
-    
-    def check_freeze_combo(self, current_time):
-        """Check if freeze spell combo is complete (I -> C -> E)"""
-        if 'freeze' not in self.unlocked_spells or self.freeze_cooldown > 0:
-            return False
-        
-        combo = [pygame.K_i, pygame.K_c, pygame.K_e]
-        if len(self.combo_buffer) >= 3 and self.combo_buffer[-3:] == combo:
-            self.combo_buffer = []
-            self.freeze_cooldown = FREEZE_COOLDOWN
-            return True
-        return False
+    def get_cooldown(self, spell_name, current_time):
+        """Get the remaining cooldown of a spell in milliseconds"""
+        return max(0, self.cooldowns.get(spell_name, current_time) - current_time)
+
+
+class EffectGroup(pygame.sprite.Group):
+    """Group of spell effects whose timers are owned by a Scheduler.
+
+    Every effect has an expires_at time and is killed by the scheduler
+    then. call_every() ties a repeating timer to an effect, and all of an
+    effect's timers are cancelled as soon as it leaves the group.
+    """
+    def __init__(self, scheduler):
+        super().__init__()
+        self.scheduler = scheduler
+        self.timers = {}  # effect: [Timer, ...]
+
+    def call_every(self, effect, interval, callback, *args, start=None):
+        """Call callback(*args) every interval milliseconds while effect is in the group"""
+        timer = self.scheduler.call_every(interval, callback, *args, start=start)
+        self.timers[effect].append(timer)
+        return timer
+
+    def add_internal(self, sprite, *args):
+        super().add_internal(sprite, *args)
+        self.timers[sprite] = [self.scheduler.call_at(sprite.expires_at, sprite.kill)]
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        for timer in self.timers.pop(sprite, ()):
+            timer.cancel()
+
+    def prune_hits(self, live_uids):
+        """Forget hits on enemies that are gone, so long-lived effects don't collect dead uids"""
+        for effect in self:
+            for hits in (getattr(effect, 'hit_enemies', None), getattr(effect, 'affected_enemies', None)):
+                if hits:
+                    hits &= live_uids
+
+
+def _effect_surface(size):
+    """Blank surface for a pre-rendered effect; black is transparent.
+
+    RLE colorkey surfaces blit quickly when mostly empty, like thin rings
+    and bolts, and SDL drops the uncompressed pixels after the first blit.
+    """
+    image = pygame.Surface(size)
+    image.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+    return image
+
+
+def _pulse_frame(elapsed, period):
+    """Index of the pre-rendered frame of abs(sin(elapsed / period))"""
+    # The pulse repeats every pi * period milliseconds
+    return int(elapsed / (math.pi * period) * PULSE_FRAMES) % PULSE_FRAMES
+
+
+def _ring_image(radius, frame, pulse_min, pulse_depth, spacing, colors):
+    """Shared image of pulsing rings (one per color, spacing apart) at one pulse frame"""
+    def build():
+        pulse = abs(math.sin(math.pi * frame / PULSE_FRAMES)) * pulse_depth + pulse_min
+        outer = max(0, int(radius * pulse))
+        image = _effect_surface((outer * 2 + 1, outer * 2 + 1))
+        for i, color in enumerate(colors):
+            ring_radius = outer - i * spacing
+            if ring_radius > 0:
+                pygame.draw.circle(image, color, (outer, outer), ring_radius, 2)
+        return image
+    return cached_surface(('rings', radius, frame, pulse_min, pulse_depth, spacing, colors), build)
 
 
 class LightningSpell(pygame.sprite.Sprite):
-    def __init__(self, start_pos, target_pos, upgrade_level=1, is_chain=False):
+    def __init__(self, start_pos, target_pos, upgrade_level=1, is_chain=False, current_time=None, rng=random, segments=None):
         super().__init__()
+        if current_time is None:
+            current_time = pygame.time.get_ticks()
         self.start_pos = start_pos
         self.target_pos = target_pos
         self.duration = 500  # Lightning effect lasts 0.5 seconds
-        self.creation_time = pygame.time.get_ticks()
+        self.creation_time = current_time
+        self.expires_at = current_time + self.duration
         self.upgrade_level = upgrade_level
         self.is_chain = is_chain  # Chain lightning is visual only
         
         # Scale damage and effects with upgrade level
-        self.damage = LIGHTNING_DAMAGE + (upgrade_level - 1) * 3
+        self.damage = LIGHTNING_DAMAGE + (upgrade_level - 1) * LIGHTNING_DAMAGE_PER_LEVEL
         self.chain_count = upgrade_level  # Chain to more enemies per level
         
-        self.hit_enemies = set()  # Track which enemies have been hit
+        self.hit_enemies = set()  # uids of enemies already hit
         
-        # Create a transparent surface for sprite (required for pygame sprite)
-        self.image = pygame.Surface((1, 1), pygame.SRCALPHA)
+        # Shared transparent surface for sprite (required for pygame sprite)
+        self.image = blank_surface()
         self.rect = self.image.get_rect(center=start_pos)
         
-        # Create lightning segments for visual effect
-        self.segments = self._generate_lightning_path()
+        # Create lightning segments for visual effect (unless restoring a known path)
+        if segments is None:
+            segments = self._generate_lightning_path(rng)
+        self.segments = segments
+        # Rasterized on first draw, and again only if the quality changes
+        self.bolt_image = self.bolt_pos = None
+        self.bolt_passes = 0
         
-    def _generate_lightning_path(self):
-        """Generate a jagged lightning path from start to target"""
+    def _generate_lightning_path(self, rng):
+        """Generate a jagged lightning path from start to target using rng"""
         segments = []
         num_segments = 5
         
@@ -156,8 +231,8 @@ class LightningSpell(pygame.sprite.Sprite):
             progress = (i + 1) / num_segments
             
             # Calculate next point with some randomness
-            next_x = self.start_pos[0] + dx * progress + random.randint(-20, 20)
-            next_y = self.start_pos[1] + dy * progress + random.randint(-20, 20)
+            next_x = self.start_pos[0] + dx * progress + rng.randint(-20, 20)
+            next_y = self.start_pos[1] + dy * progress + rng.randint(-20, 20)
             
             # Last segment should always hit target
             if i == num_segments - 1:
@@ -169,24 +244,34 @@ class LightningSpell(pygame.sprite.Sprite):
         
         return segments
     
-    def update(self, current_time):
-        """Update lightning spell"""
-        if current_time - self.creation_time > self.duration:
-            self.kill()
-    
-    def draw(self, surface):
-        """Draw the lightning effect"""
+    def _render_bolt(self, passes=3):
+        """Draw the bolt (passes outlines, up to 3) onto its own surface and return it with its top-left position"""
+        points = [start for start, _ in self.segments] + [self.segments[-1][1]]
+        margin = 3  # Room for the thickest line
+        left = int(min(x for x, _ in points)) - margin
+        top = int(min(y for _, y in points)) - margin
+        right = int(max(x for x, _ in points)) + margin
+        bottom = int(max(y for _, y in points)) + margin
+        image = _effect_surface((right - left + 1, bottom - top + 1))
+        
         # Draw multiple lightning bolts for effect
-        for i in range(3):
-            offset = i * 2
+        for i in range(passes):
+            color = BRIGHT_YELLOW if i == 0 else YELLOW
+            thickness = 3 - i
             for start, end in self.segments:
-                color = BRIGHT_YELLOW if i == 0 else YELLOW
-                thickness = 3 - i
-                pygame.draw.line(surface, color, start, end, thickness)
+                pygame.draw.line(image, color, (start[0] - left, start[1] - top), (end[0] - left, end[1] - top), thickness)
+        return image, (left, top)
+    
+    def draw(self, surface, passes=3):
+        """Draw the lightning effect with passes bolt outlines and return the rects it covered"""
+        if passes != self.bolt_passes:
+            self.bolt_image, self.bolt_pos = self._render_bolt(passes)
+            self.bolt_passes = passes
+        return [surface.blit(self.bolt_image, self.bolt_pos)]
     
     def check_hit(self, enemy):
         """Check if enemy is within lightning range and hasn't been hit yet"""
-        if id(enemy) in self.hit_enemies:
+        if enemy.uid in self.hit_enemies:
             return False
         
         # Check if enemy is close to any lightning segment
@@ -195,8 +280,8 @@ class LightningSpell(pygame.sprite.Sprite):
                 (enemy.rect.centerx, enemy.rect.centery),
                 start, end
             )
-            if dist < 30:  # Lightning hit radius
-                self.hit_enemies.add(id(enemy))
+            if dist < LIGHTNING_HIT_RADIUS:
+                self.hit_enemies.add(enemy.uid)
                 return True
         return False
     
@@ -223,161 +308,119 @@ class LightningSpell(pygame.sprite.Sprite):
         return math.hypot(px - closest_x, py - closest_y)
 
 
-class FireballSpell(pygame.sprite.Sprite):
-    def __init__(self, start_pos, direction, upgrade_level=1):
+def _fireball_image(size):
+    """Shared fireball surface for a given size"""
+    def build():
+        radius = size // 2
+        image = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(image, ORANGE, (radius, radius), radius)
+        pygame.draw.circle(image, BRIGHT_ORANGE, (radius, radius), int(radius * 0.6))
+        return image
+    return cached_surface(('fireball', size), build)
+
+
+class FireballSpell(PooledSprite):
+    def __init__(self, start_pos, direction, upgrade_level=1, current_time=None):
         super().__init__()
+        self.reset(start_pos, direction, upgrade_level, current_time)
+
+    def reset(self, start_pos, direction, upgrade_level=1, current_time=None):
+        if current_time is None:
+            current_time = pygame.time.get_ticks()
         self.upgrade_level = upgrade_level
         
         # Scale size with upgrade level
-        base_size = 40
-        size = base_size + (upgrade_level - 1) * 10
-        radius = size // 2
-        
-        self.image = pygame.Surface((size, size), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, ORANGE, (radius, radius), radius)
-        pygame.draw.circle(self.image, BRIGHT_ORANGE, (radius, radius), int(radius * 0.6))
+        size = FIREBALL_SIZE + (upgrade_level - 1) * FIREBALL_SIZE_PER_LEVEL
+        self.image = _fireball_image(size)
         
         self.rect = self.image.get_rect(center=start_pos)
+        self.pos = (float(start_pos[0]), float(start_pos[1]))  # Float center
+        self.prev_pos = self.pos  # Center before the last step, for interpolated drawing
         self.direction = direction
         
         # Scale damage and speed with upgrade level
-        self.damage = FIREBALL_DAMAGE + (upgrade_level - 1) * 4
-        self.speed = FIREBALL_SPEED + (upgrade_level - 1) * 0.5
+        self.damage = FIREBALL_DAMAGE + (upgrade_level - 1) * FIREBALL_DAMAGE_PER_LEVEL
+        self.speed = FIREBALL_SPEED + (upgrade_level - 1) * FIREBALL_SPEED_PER_LEVEL
         
-        self.lifetime = 3000 + (upgrade_level - 1) * 1000  # Longer lifetime per level
-        self.creation_time = pygame.time.get_ticks()
-        self.hit_enemies = set()  # Track which enemies have been hit
+        self.lifetime = FIREBALL_LIFETIME + (upgrade_level - 1) * FIREBALL_LIFETIME_PER_LEVEL
+        self.creation_time = current_time
+        self.expires_at = current_time + self.lifetime
+        self.hit_enemies = set()  # uids of enemies already hit
     
-    def update(self, current_time, screen_rect):
+    def update(self, screen_rect, scale=1.0):
         """Update fireball position"""
-        self.rect.x += self.direction[0] * self.speed
-        self.rect.y += self.direction[1] * self.speed
+        self.prev_pos = x, y = self.pos
+        self.pos = (x + self.direction[0] * self.speed * scale, y + self.direction[1] * self.speed * scale)
+        self.rect.center = (round(self.pos[0]), round(self.pos[1]))
         
-        # Remove if off screen or lifetime expired
-        if not screen_rect.colliderect(self.rect) or current_time - self.creation_time > self.lifetime:
+        # Remove if off screen (EffectGroup removes it when its lifetime expires)
+        if not screen_rect.colliderect(self.rect):
             self.kill()
 
 
+FireballSpell.pool = Pool(FireballSpell)
+
+
 class FireballExplosion(pygame.sprite.Sprite):
-    def __init__(self, center_pos, upgrade_level):
+    def __init__(self, center_pos, upgrade_level, current_time=None):
         super().__init__()
+        if current_time is None:
+            current_time = pygame.time.get_ticks()
         self.center_pos = center_pos
         self.upgrade_level = upgrade_level
-        self.radius = 80 + (upgrade_level - 2) * 20  # Larger radius for higher levels
-        self.duration = 2000 + (upgrade_level - 2) * 500  # Lasts longer at higher levels
-        self.creation_time = pygame.time.get_ticks()
-        self.damage_per_tick = 1  # Damage dealt every tick
-        self.tick_rate = 500  # Damage every 0.5 seconds
-        self.last_damage_time = self.creation_time
-        
-        # Create a transparent surface for sprite
-        self.image = pygame.Surface((1, 1), pygame.SRCALPHA)
+        self.radius = EXPLOSION_RADIUS + (upgrade_level - 2) * EXPLOSION_RADIUS_PER_LEVEL
+        self.duration = EXPLOSION_DURATION + (upgrade_level - 2) * EXPLOSION_DURATION_PER_LEVEL
+        self.creation_time = current_time
+        self.expires_at = current_time + self.duration
+        self.damage_per_tick = EXPLOSION_DAMAGE
+        self.tick_rate = EXPLOSION_TICK_RATE
+        
+        # Shared transparent surface for sprite
+        self.image = blank_surface()
         self.rect = self.image.get_rect(center=center_pos)
     
-    def update(self, current_time):
-        """Update explosion effect"""
-        if current_time - self.creation_time > self.duration:
-            self.kill()
-    
-    def draw(self, surface, current_time):
-        """Draw the fire explosion effect"""
-        # Pulsing effect
-        elapsed = current_time - self.creation_time
-        pulse = abs(math.sin(elapsed / 150)) * 0.2 + 0.8
-        
-        # Draw multiple rings for fire effect
-        for i in range(3):
-            radius = int(self.radius * pulse) - i * 15
-            if radius > 0:
-                alpha = int(150 * (1 - i / 3))
-                # Draw orange/red fire rings
-                color = ORANGE if i % 2 == 0 else (255, 100, 0)
-                pygame.draw.circle(surface, color, self.center_pos, radius, 2)
-    
-    def is_in_range(self, enemy_pos):
-        """Check if position is within explosion radius"""
-        dx = enemy_pos[0] - self.center_pos[0]
-        dy = enemy_pos[1] - self.center_pos[1]
-        return math.hypot(dx, dy) <= self.radius
-    
-    def should_damage_now(self, current_time):
-        """Check if it's time to deal damage"""
-        return current_time - self.last_damage_time >= self.tick_rate
+    def draw(self, surface, current_time, rings=3):
+        """Draw the fire explosion effect (rings rings, up to 3) and return the rects it covered"""
+        # Pulsing orange/red fire rings
+        frame = _pulse_frame(current_time - self.creation_time, 150)
+        image = _ring_image(self.radius, frame, 0.8, 0.2, 15, (ORANGE, (255, 100, 0), ORANGE)[:rings])
+        return [surface.blit(image, image.get_rect(center=self.center_pos))]
     
-    def reset_damage_timer(self, current_time):
-        """Reset the damage timer after dealing damage"""
-        self.last_damage_time = current_time
 
 
 class FreezeSpell(pygame.sprite.Sprite):
-    def __init__(self, center_pos, upgrade_level=1):
+    def __init__(self, center_pos, upgrade_level=1, current_time=None):
         super().__init__()
+        if current_time is None:
+            current_time = pygame.time.get_ticks()
         self.center_pos = center_pos
         self.upgrade_level = upgrade_level
         
         # Scale radius and duration with upgrade level
-        self.radius = FREEZE_RADIUS + (upgrade_level - 1) * 50
-        self.duration = FREEZE_DURATION + (upgrade_level - 1) * 1000
-        self.slow_multiplier = 0.3 - (upgrade_level - 1) * 0.05  # Slows more per level (min 0.1)
-        self.slow_multiplier = max(0.1, self.slow_multiplier)
+        self.radius = FREEZE_RADIUS + (upgrade_level - 1) * FREEZE_RADIUS_PER_LEVEL
+        self.duration = FREEZE_DURATION + (upgrade_level - 1) * FREEZE_DURATION_PER_LEVEL
+        self.slow_multiplier = FREEZE_SLOW + (upgrade_level - 1) * FREEZE_SLOW_PER_LEVEL
+        self.slow_multiplier = max(FREEZE_MIN_SLOW, self.slow_multiplier)
         
-        self.creation_time = pygame.time.get_ticks()
-        self.affected_enemies = {}  # enemy_id: original_speed
+        self.creation_time = current_time
+        self.expires_at = current_time + self.duration
+        self.affected_enemies = set()  # uids of enemies this field has already slowed
         
-        # Create a transparent surface for sprite (required for pygame sprite)
-        self.image = pygame.Surface((1, 1), pygame.SRCALPHA)
+        # Shared transparent surface for sprite (required for pygame sprite)
+        self.image = blank_surface()
         self.rect = self.image.get_rect(center=center_pos)
     
-    def update(self, current_time):
-        """Update freeze spell"""
-        if current_time - self.creation_time > self.duration:
-            # Restore enemy speeds before killing
-            self.restore_enemy_speeds()
-            self.kill()
-    
-    def draw(self, surface, current_time):
-        """Draw the freeze effect"""
-        # Pulsing effect
-        elapsed = current_time - self.creation_time
-        pulse = abs(math.sin(elapsed / 200)) * 0.3 + 0.7
-        
-        # Draw expanding rings
-        for i in range(3):
-            radius = int(self.radius * pulse) - i * 20
-            if radius > 0:
-                alpha = int(100 * (1 - i / 3))
-                color = (*BLUE[:3], alpha) if len(BLUE) == 4 else BLUE
-                pygame.draw.circle(surface, color, self.center_pos, radius, 2)
-    
-    def is_in_range(self, enemy_pos):
-        """Check if position is within freeze radius"""
-        dx = enemy_pos[0] - self.center_pos[0]
-        dy = enemy_pos[1] - self.center_pos[1]
-        return math.hypot(dx, dy) <= self.radius
-    
-    def freeze_enemy(self, enemy):
-        """Apply freeze effect to enemy"""
-        enemy_id = id(enemy)
-        if enemy_id not in self.affected_enemies:
-            # Store original speed and reduce it
-            if hasattr(enemy, 'original_speed'):
-                self.affected_enemies[enemy_id] = enemy.original_speed
-            else:
-                # Detect enemy type and store appropriate speed
-                if hasattr(enemy, 'health') and enemy.health > 10:
-                    self.affected_enemies[enemy_id] = 1.5  # Boss
-                elif hasattr(enemy, 'health') and enemy.health > 1:
-                    self.affected_enemies[enemy_id] = 1  # Tank
-                else:
-                    self.affected_enemies[enemy_id] = 2  # Regular
-            
-            # Slow down enemy
-            enemy.speed_multiplier = self.slow_multiplier
+    def draw(self, surface, current_time, rings=3):
+        """Draw the freeze effect (rings rings, up to 3) and return the rects it covered"""
+        # Pulsing, expanding rings
+        frame = _pulse_frame(current_time - self.creation_time, 200)
+        image = _ring_image(self.radius, frame, 0.7, 0.3, 20, (BLUE,) * rings)
+        return [surface.blit(image, image.get_rect(center=self.center_pos))]
     
-    def restore_enemy_speeds(self):
-        """Restore all affected enemies to normal speed"""
-        # This will be handled in the main game loop
-        pass
+    def freeze_enemy(self, enemy, status_effects):
+        """Slow an enemy this field has not slowed yet until it expires (speed is restored by status_effects)"""
+        self.affected_enemies.add(enemy.uid)
+        status_effects.apply_slow(enemy, self.slow_multiplier, self, self.expires_at)
 
 
 # Spell info for selection menu
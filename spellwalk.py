@@ -1,17 +1,37 @@
+import argparse
+import os
 import pygame
 import random
 import math
-from button import Button
-import pygame_widgets
-from pygame_widgets.slider import Slider
-from pygame_widgets.textbox import TextBox
-from spells import SpellManager, LightningSpell, FireballSpell, FreezeSpell, FireballExplosion, SPELL_INFO
+import time
+from button import Button, Card, MenuScreen
+from spells import SpellManager, EffectGroup, LightningSpell, FireballSpell, FreezeSpell, FireballExplosion, SPELL_INFO, LIGHTNING_HIT_RADIUS
+from game_clock import RealClock
+from game_input import LiveInput, IdleInput, QueuedInput
+from replay import InputRecorder, Replay
+from scheduler import Scheduler
+from spatial import SpatialHash
+from enemy_store import StoredEnemy, EnemyGroup
+from status_effects import StatusEffects
+from text_cache import get_font, render_text, preload_fonts, load_pending_fonts
+from render import FullRenderer, DirtyRectRenderer, blit_centered
+from pool import Pool, PooledSprite, solid_surface
+from damage import DamageBuffer
+from profiler import FrameProfiler, NullProfiler
+from snapshot import RewindBuffer, save, read, restore
+from quality import QualityGovernor, QUALITY_NAMES
+from pipeline import FrameState, SimulationWorker, interpolated
+from scenes import Scene, SceneManager, run_modal, SWITCH, PUSH, POP, QUIT
+from memory_audit import MemoryAudit
+from metrics import MetricsExporter
 
 
-# Initialize Pygame and constants
-pygame.init()
+# Constants (pygame and the window are initialized by get_screen() on first use)
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
+SCREEN_RECT = pygame.Rect(0, 0, WIDTH, HEIGHT)  # Play area
+screen = None  # Game window, see get_screen()
+metrics = None  # MetricsExporter fed by every session, started by main() when METRICS_PORT is set
+FONT_SIZES = (80, 40, 60, 30, 20, 32, 24, 18, 16)  # Menu, HUD and spell card fonts, roughly in order of first use
 
 # Colors
 WHITE = (255, 255, 255)
@@ -19,6 +39,7 @@ RED = (200, 0, 0)
 GREEN = (0, 200, 0)
 DARK_RED = (100, 0, 0)
 PURPLE = (128, 0, 128)
+BACKGROUND = (30, 30, 30)
 
 # Game constants/settings
 PLAYER_SPEED = 3
@@ -28,21 +49,28 @@ BOSS_ENEMY_SPEED = 1.5  # Speed for boss enemy
 PROJECTILE_SPEED = 7
 PROJECTILE_SIZE = 10  # Base projectile size
 enemy_dmg = 1
-EXP = 0
-LVL = 1
 SPAWNRATE = 2000  # Initial enemy spawn rate in milliseconds
 NEXT_WAVE_TIME = 30000  # Time until next wave in milliseconds
-
-# Timed events
-SPAWN_ENEMY = pygame.USEREVENT + 1
-FIRE_PROJECTILE = pygame.USEREVENT + 2
-SPAWN_TANK_ENEMY = pygame.USEREVENT + 3
-
-# Set timers for spawning enemies and firing projectiles
-
-pygame.time.set_timer(SPAWN_ENEMY, SPAWNRATE)
-pygame.time.set_timer(FIRE_PROJECTILE, 1000)
-pygame.time.set_timer(SPAWN_TANK_ENEMY, SPAWNRATE * 2)  # Spawn tank enemies less frequently
+MENU_FPS = 30  # Menus only need to track the mouse, so don't spin at full speed
+DIRTY_RECT_RENDERING = False  # Update only changed regions instead of flipping the full screen
+PROFILE_CSV = None  # Path to dump per-frame phase timings to when a session ends
+CHAIN_RANGE = 150  # Max distance for chain lightning to jump between enemies
+SEED = None  # Seed for spawns and lightning paths (random per session when None)
+RECORD_PATH = None  # Path to record each session's inputs to, for replay.py (see recording_path())
+FIRE_RATE = 1000  # Milliseconds between automatic projectile shots
+SIM_RATE = 60  # Simulation steps per second, independent of the frame rate (speeds are pixels per 1/60 s)
+MAX_STEPS_PER_FRAME = 5  # Steps one frame may run to catch up; beyond that the game slows down
+MAX_FRAME_SKIP = 5  # Renders skipped in a row while the simulation is behind
+QUALITY = None  # Fixed visual quality level (0 = full), or None to adapt it to frame times
+THREADED_SIMULATION = False  # Run simulation steps on a worker thread, overlapped with drawing
+MEMORY_AUDIT = False  # Print tracemalloc growth sites every wave (slow; for hunting memory creep)
+HIT_PRUNE_INTERVAL = 1000  # Milliseconds between sweeps of dead enemies out of effect hit sets
+METRICS_PORT = None  # Local port to serve Prometheus metrics on (see metrics.py), or None
+REWIND_CAPACITY = 300  # Snapshots kept for rewinding (30 seconds at one per REWIND_INTERVAL)
+REWIND_INTERVAL = 100  # Milliseconds of game time between rewind snapshots
+REWIND_STEPS = 10  # Snapshots undone per Backspace press (one second)
+QUICKSAVE_PATH = "quicksave.swsn"  # Written by F5, loaded by F9
+CRASH_DUMP_PATH = "crash.swsn"  # Newest rewind snapshot, written if a session raises
 
 
 # --- Player class ---
@@ -53,9 +81,11 @@ class Player(pygame.sprite.Sprite):
         self.image = pygame.Surface((30, 30))
         self.image.fill(GREEN)
         self.rect = self.image.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+        self.pos = [float(WIDTH // 2), float(HEIGHT // 2)]  # Float center, so slow diagonal moves don't drift
+        self.prev_pos = tuple(self.pos)  # Center before the last step, for interpolated drawing
         self.health = 100 # Player health
 
-    def update(self, keys):
+    def update(self, keys, scale=1.0):
         # Player movement based on key presses
         dx = dy = 0
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
@@ -67,657 +97,1013 @@ class Player(pygame.sprite.Sprite):
         if keys[pygame.K_DOWN] or keys[pygame.K_s]:
             dy = PLAYER_SPEED
         
-        # Update player position
-        self.rect.x += dx
-        self.rect.y += dy
-        # Keep player within screen bounds
-        self.rect.clamp_ip(screen.get_rect())
+        # Update player position, keeping the player within screen bounds
+        self.prev_pos = tuple(self.pos)
+        half_w, half_h = self.rect.width / 2, self.rect.height / 2
+        self.pos[0] = min(max(self.pos[0] + dx * scale, half_w), WIDTH - half_w)
+        self.pos[1] = min(max(self.pos[1] + dy * scale, half_h), HEIGHT - half_h)
+        self.rect.center = (round(self.pos[0]), round(self.pos[1]))
 
 # --- Enemy class ---
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, player):
+class Enemy(StoredEnemy, PooledSprite):
+    size = 20
+    color = RED
+    speed = ENEMY_SPEED
+    max_health = 1  # Regular enemies have 1 health
+    exp_reward = 1  # EXP awarded on kill
+
+    def __init__(self, player, rng=random):
         super().__init__()
-        # Enemy representation (a red square)
-        self.image = pygame.Surface((20, 20))
-        self.image.fill(RED)
+        self.reset(player, rng)
+
+    def reset(self, player, rng=random):
+        # Enemy representation (a red square), one surface shared by every enemy of this type
+        self.image = solid_surface((self.size, self.size), self.color)
 
         # Spawn enemy at random edge position
-        x = random.choice([0, WIDTH])
-        y = random.choice([0, HEIGHT])
+        x = rng.choice([0, WIDTH])
+        y = rng.choice([0, HEIGHT])
         self.rect = self.image.get_rect(center=(x, y))
         self.player = player # Reference to player for tracking
-        self.speed_multiplier = 1.0  # For spell effects
-        self.health = 1  # Regular enemies have 1 health
-    
-    def update(self):
-        # Enemy movement towards player
-        dx = self.player.rect.centerx - self.rect.centerx
-        dy = self.player.rect.centery - self.rect.centery
-        dist = math.hypot(dx, dy)
-        if dist == 0:
-            dist = 1 # Prevent division by zero
-        dx, dy, = dx / dist, dy / dist # Normalize direction vector
-
-        # Update enemy position with speed multiplier
-        self.rect.x += dx * ENEMY_SPEED * self.speed_multiplier
-        self.rect.y += dy * ENEMY_SPEED * self.speed_multiplier
-
-# --- Tank Enemy class ---
-class TankEnemy(pygame.sprite.Sprite):
-    def __init__(self, player):
-        super().__init__()
-        # Tank Enemy representation (a larger dark red square)
-        self.image = pygame.Surface((30, 30))
-        self.image.fill(DARK_RED)
+        self.health = self.max_health
+        self.speed_multiplier = 1.0
 
-        # Spawn enemy at random edge position
-        x = random.choice([0, WIDTH])
-        y = random.choice([0, HEIGHT])
-        self.rect = self.image.get_rect(center=(x, y))
-        self.player = player  # Reference to player for tracking
-        self.health = 3  # Takes 3 hits to kill
-        self.speed_multiplier = 1.0  # For spell effects
+    def forget(self):
+        self.player = None  # Set again by reset() on the next spawn
     
     def update(self):
-        # Enemy movement towards player (slower than regular enemy)
-        dx = self.player.rect.centerx - self.rect.centerx
-        dy = self.player.rect.centery - self.rect.centery
-        dist = math.hypot(dx, dy)
-        if dist == 0:
-            dist = 1  # Prevent division by zero
-        dx, dy, = dx / dist, dy / dist  # Normalize direction vector
+        # Enemy movement towards player (EnemyGroup moves all enemies at once instead)
+        self.move_towards(self.player.rect.center)
 
-        # Update enemy position with slower speed
-        self.rect.x += dx * TANK_ENEMY_SPEED * self.speed_multiplier
-        self.rect.y += dy * TANK_ENEMY_SPEED * self.speed_multiplier
+# --- Tank Enemy class ---
+class TankEnemy(Enemy):
+    # Tank Enemy representation (a larger dark red square, slower than regular enemy)
+    size = 30
+    color = DARK_RED
+    speed = TANK_ENEMY_SPEED
+    max_health = 3  # Takes 3 hits to kill
+    exp_reward = 3
 
 # --- Boss Enemy class ---
-class BossEnemy(pygame.sprite.Sprite):
-    def __init__(self, player):
-        super().__init__()
-        # Boss Enemy representation (a large purple square)
-        self.image = pygame.Surface((50, 50))
-        self.image.fill(PURPLE)
-
-        # Spawn boss at random edge position
-        x = random.choice([0, WIDTH])
-        y = random.choice([0, HEIGHT])
-        self.rect = self.image.get_rect(center=(x, y))
-        self.player = player  # Reference to player for tracking
-        self.health = 20  # Takes 20 hits to kill
-        self.speed_multiplier = 1.0  # For spell effects
-    
-    def update(self):
-        # Boss movement towards player
-        dx = self.player.rect.centerx - self.rect.centerx
-        dy = self.player.rect.centery - self.rect.centery
-        dist = math.hypot(dx, dy)
-        if dist == 0:
-            dist = 1  # Prevent division by zero
-        dx, dy, = dx / dist, dy / dist  # Normalize direction vector
-
-        # Update boss position
-        self.rect.x += dx * BOSS_ENEMY_SPEED * self.speed_multiplier
-        self.rect.y += dy * BOSS_ENEMY_SPEED * self.speed_multiplier
+class BossEnemy(Enemy):
+    # Boss Enemy representation (a large purple square)
+    size = 50
+    color = PURPLE
+    speed = BOSS_ENEMY_SPEED
+    max_health = 20  # Takes 20 hits to kill
+    exp_reward = 10
 
 # --- Projectile class ---
-class Projectile(pygame.sprite.Sprite):
+class Projectile(PooledSprite):
     def __init__(self, pos, direction, size=10):
         super().__init__()
+        self.reset(pos, direction, size)
+
+    def reset(self, pos, direction, size=10):
         # Projectile representation (a white square)
-        self.image = pygame.Surface((size, size))
-        self.image.fill(WHITE)
+        self.image = solid_surface((size, size), WHITE)
         self.rect = self.image.get_rect(center=pos)
+        self.pos = (float(pos[0]), float(pos[1]))  # Float center
+        self.prev_pos = self.pos
         self.direction = direction # Direction vector
 
-    def update(self):
+    def update(self, scale=1.0):
         # Update projectile position
-        self.rect.x += self.direction[0] * PROJECTILE_SPEED
-        self.rect.y += self.direction[1] * PROJECTILE_SPEED
+        self.prev_pos = x, y = self.pos
+        self.pos = (x + self.direction[0] * PROJECTILE_SPEED * scale, y + self.direction[1] * PROJECTILE_SPEED * scale)
+        self.rect.center = (round(self.pos[0]), round(self.pos[1]))
 
         # Remove projectile if it goes off-screen
-        if not screen.get_rect().colliderect(self.rect):
+        if not SCREEN_RECT.colliderect(self.rect):
             self.kill()
 
-# --- Sprite groups ---
-player = Player()
-player_group = pygame.sprite.Group(player)
-enemies = pygame.sprite.Group()
-projectiles = pygame.sprite.Group()
+# --- Object pools (killed sprites are reused by the next spawn of the same type) ---
+Enemy.pool = Pool(Enemy)
+TankEnemy.pool = Pool(TankEnemy)
+BossEnemy.pool = Pool(BossEnemy)
+Projectile.pool = Pool(Projectile)
 
 
-# --- Main menu Functions ---
+def get_screen():
+    """Return the game window, initializing pygame and opening it on first use.
 
-def main_menu():
-    pygame.display.set_caption("Spellwalk - Main Menu")
+    Importing this module opens nothing, so tools that only need the game
+    logic (or headless sessions) never pay for a window. The fonts are
+    queued once the window exists, and the main menu loads a few per frame.
+    """
+    global screen
+    if screen is None:
+        pygame.init()
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        preload_fonts(FONT_SIZES)
+    return screen
 
-    while True:
-        # Fill the background
-        screen.fill((0, 0, 0))
-        mouse_pos = pygame.mouse.get_pos()
 
-        menu_text = pygame.font.Font(None, 80).render("Spellwalk", True, WHITE)
-        screen.blit(menu_text, (WIDTH // 2 - menu_text.get_width() // 2, 100))
+recorded_sessions = 0  # Sessions recorded so far this run
+
+
+def recording_path():
+    """File for the next recorded session: RECORD_PATH for the first, then with -2, -3, ... before the extension"""
+    global recorded_sessions
+    recorded_sessions += 1
+    if recorded_sessions == 1:
+        return RECORD_PATH
+    root, extension = os.path.splitext(RECORD_PATH)
+    return f"{root}-{recorded_sessions}{extension}"
+
 
-        # Create buttons
-        play_button = Button(None, (WIDTH // 2, HEIGHT // 2 - 50), "Play", pygame.font.Font(None, 40), WHITE, GREEN)
-        options_button = Button(None, (WIDTH // 2, HEIGHT // 2 + 10), "Options", pygame.font.Font(None, 40), WHITE, GREEN)
-        quit_button = Button(None, (WIDTH // 2, HEIGHT // 2 + 70), "Quit", pygame.font.Font(None, 40), WHITE, GREEN)
+def steps_per(interval):
+    """Simulation steps (at least one) closest to interval milliseconds at SIM_RATE"""
+    return max(1, round(interval * SIM_RATE / 1000))
+
+
+# --- Menu scenes ---
+
+class MainMenuScene(Scene):
+    """Title screen with Play, Options and Quit"""
+    def enter(self):
+        pygame.display.set_caption("Spellwalk - Main Menu")
+
+        # Build the page once; only buttons whose hover state changes are redrawn
+        menu_text = render_text("Spellwalk", 80, WHITE)
+        self.play_button = Button(None, (WIDTH // 2, HEIGHT // 2 - 50), "Play", get_font(40), WHITE, GREEN)
+        self.options_button = Button(None, (WIDTH // 2, HEIGHT // 2 + 10), "Options", get_font(40), WHITE, GREEN)
+        self.quit_button = Button(None, (WIDTH // 2, HEIGHT // 2 + 70), "Quit", get_font(40), WHITE, GREEN)
+        self.menu = MenuScreen((0, 0, 0), [self.play_button, self.options_button, self.quit_button],
+                               [(menu_text, (WIDTH // 2 - menu_text.get_width() // 2, 100))])
+        self.clock = pygame.time.Clock()
+        self.resume()
+
+    def resume(self):
+        # Fresh page, or another screen drew over the menu, so draw all of it
+        self.menu.draw(get_screen())
+        pygame.display.flip()
+
+    def frame(self):
+        screen = get_screen()
+        self.clock.tick(MENU_FPS)
+        load_pending_fonts()  # While the menu idles, so the game's fonts are ready when it starts
+        mouse_pos = pygame.mouse.get_pos()
 
         #Update and draw buttons
-        for button in [play_button, options_button, quit_button]:
-            button.change_color(mouse_pos)
-            button.update(screen)
+        dirty = self.menu.refresh(screen, mouse_pos)
 
         # Event handling
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                return
+                return (QUIT, None)
             if event.type == pygame.MOUSEBUTTONDOWN:
-                if play_button.check_for_input(mouse_pos):
-                    play()
-                if options_button.check_for_input(mouse_pos):
-                    options()
-                if quit_button.check_for_input(mouse_pos):
-                    pygame.quit()
-                    return
+                if self.play_button.check_for_input(mouse_pos):
+                    return (SWITCH, GameplayScene())
+                if self.options_button.check_for_input(mouse_pos):
+                    return (PUSH, OptionsScene())
+                if self.quit_button.check_for_input(mouse_pos):
+                    return (QUIT, None)
                 
-        # Update the display
-        pygame.display.flip()
+        # Update only the changed parts of the display
+        if dirty:
+            pygame.display.update(dirty)
+        return None
                 
 
-def options():
-    
-    global enemy_dmg
-    slider = Slider(screen, 300, 300, 200, 20, min=1, max=10, step=1, initial=enemy_dmg)
-    textbox = TextBox(screen, 300, 250, 200, 40,
-                      fontSize=24, textColour=WHITE, colour=(40,40,40),
-                      borderThickness=2, borderColour=WHITE)
-    textbox.disable()
-    textbox.setText(f"Enemy DMG: {int(enemy_dmg)}")
-
-    while True:
-        # Display options menu
-        screen.fill((50, 50, 50))
-        options_text = pygame.font.Font(None, 60).render("Options Menu - Press ESC to return", True, WHITE)
-        screen.blit(options_text, (WIDTH // 2 - options_text.get_width() // 2, 100))
+class OptionsScene(Scene):
+    """Enemy damage slider; ESC returns to the screen below"""
+    background = (50, 50, 50)
 
+    def enter(self):
+        # The widget library is only needed here, so it is not imported at startup
+        import pygame_widgets
+        from pygame_widgets.slider import Slider
+        from pygame_widgets.textbox import TextBox
 
+        screen = get_screen()
+        self.slider = Slider(screen, 300, 300, 200, 20, min=1, max=10, step=1, initial=enemy_dmg)
+        self.textbox = TextBox(screen, 300, 250, 200, 40,
+                               fontSize=24, textColour=WHITE, colour=(40,40,40),
+                               borderThickness=2, borderColour=WHITE)
+        self.textbox.disable()
+        self.textbox.setText(f"Enemy DMG: {int(enemy_dmg)}")
+        self.update_widgets = pygame_widgets.update
+        self.clock = pygame.time.Clock()
+
+        # Draw the page once; each frame only the widgets' areas are redrawn (the slider handle overhangs its track)
+        slider = self.slider
+        overhang = max(slider.handleRadius, slider.radius)
+        self.widget_rects = [
+            pygame.Rect(slider.getX() - overhang, slider.getY() + slider.getHeight() // 2 - overhang,
+                        slider.getWidth() + 2 * overhang + 1, 2 * overhang + 1),
+            pygame.Rect(self.textbox.getX(), self.textbox.getY(), self.textbox.getWidth(), self.textbox.getHeight()),
+        ]
+        options_text = render_text("Options Menu - Press ESC to return", 60, WHITE)
+        screen.fill(self.background)
+        screen.blit(options_text, (WIDTH // 2 - options_text.get_width() // 2, 100))
+        pygame.display.flip()
+
+    def frame(self):
+        global enemy_dmg
+        screen = get_screen()
+        self.clock.tick(MENU_FPS)
 
         # Event handling
         events = pygame.event.get()
         for event in events:
             if event.type == pygame.QUIT:
-                pygame.quit()
-                return
+                return (QUIT, None)
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    enemy_dmg = int(slider.getValue())
-                    return
+                    enemy_dmg = int(self.slider.getValue())
+                    return (POP, None)
                 
-        textbox.setText(f"Enemy DMG: {int(slider.getValue())}")
-        enemy_dmg = int(slider.getValue())
+        self.textbox.setText(f"Enemy DMG: {int(self.slider.getValue())}")
+        enemy_dmg = int(self.slider.getValue())
+
+        # Redraw the widgets over their own background and update only their areas
+        for rect in self.widget_rects:
+            screen.fill(self.background, rect)
+        self.update_widgets(events)
+        pygame.display.update(self.widget_rects)
+        return None
 
-        pygame_widgets.update(events)
+    def exit(self):
+        # pygame_widgets keeps every widget ever created in a global list and draws them all
+        from pygame_widgets.widget import WidgetHandler
+        WidgetHandler.removeWidget(self.slider)
+        WidgetHandler.removeWidget(self.textbox)
+        self.slider = self.textbox = None
+
+
+def build_spell_card(rect, spell_key, current_level):
+    """Pre-render one spell option box for the selection menu"""
+    spell_info = SPELL_INFO[spell_key]
+    lines = []
+
+    # Spell name with level
+    spell_name = spell_info['name']
+    if current_level > 0:
+        spell_name += f" Lv.{current_level}"
+    lines.append((render_text(spell_name, 32, WHITE), 15))
+
+    # Combo
+    lines.append((render_text(f"Combo: {spell_info['combo']}", 24, (200, 200, 255)), 50))
+
+    # Upgrade info or description
+    if current_level > 0:
+        lines.append((render_text("UPGRADE: More Power!", 16, (100, 255, 100)), 80))
+    else:
+        lines.append((render_text(spell_info['description'], 16, (180, 180, 180)), 80))
+
+    # Stats
+    y_offset = 105
+    if 'damage' in spell_info:
+        lines.append((render_text(f"DMG: {spell_info['damage']}", 18, (255, 100, 100)), y_offset))
+        y_offset += 20
+    if 'duration' in spell_info:
+        lines.append((render_text(f"Duration: {spell_info['duration']}s", 18, (100, 200, 255)), y_offset))
+        y_offset += 20
+    if 'cooldown' in spell_info:
+        lines.append((render_text(f"CD: {spell_info['cooldown']}s", 18, (200, 200, 100)), y_offset))
+
+    return Card(rect, lines, ((40, 40, 60), WHITE), ((60, 60, 80), (255, 215, 0)))
+
+class SpellSelectionScene(Scene):
+    """Spell choice shown every 3 levels; pops with the chosen spell key"""
+    available_spells = ('lightning', 'fireball', 'freeze')
+
+    def __init__(self, spell_manager):
+        self.spell_manager = spell_manager
+
+    def enter(self):
+        screen = get_screen()
+        # Create spell option boxes
+        self.spell_cards = []
+        for i, spell_key in enumerate(self.available_spells):
+            x = WIDTH // 4 + i * (WIDTH // 4)
+            y = HEIGHT // 2
+            rect = pygame.Rect(x - 100, y - 80, 200, 180)
+            self.spell_cards.append((build_spell_card(rect, spell_key, self.spell_manager.get_spell_level(spell_key)), spell_key))
+
+        title_text = render_text("Choose Your Spell!", 60, WHITE)
+        subtitle_text = render_text("Click to select", 30, WHITE)
+        self.menu = MenuScreen((20, 20, 40), [card for card, _ in self.spell_cards], [
+            (title_text, (WIDTH // 2 - title_text.get_width() // 2, 50)),
+            (subtitle_text, (WIDTH // 2 - subtitle_text.get_width() // 2, 110)),
+        ])
+        self.clock = pygame.time.Clock()
+        self.menu.draw(screen)
         pygame.display.flip()
 
-def spell_selection_menu(spell_manager):
-    """Display spell selection menu when player reaches level 3"""
-    available_spells = ['lightning', 'fireball', 'freeze']
-    
-    selected_spell = None
-    
-    # Create spell option boxes
-    spell_rects = []
-    for i, spell_key in enumerate(available_spells):
-        x = WIDTH // 4 + i * (WIDTH // 4)
-        y = HEIGHT // 2
-        rect = pygame.Rect(x - 100, y - 80, 200, 180)
-        spell_rects.append((rect, spell_key))
-    
-    while selected_spell is None:
-        screen.fill((20, 20, 40))
-        
-        # Title
-        title_font = pygame.font.Font(None, 60)
-        title_text = title_font.render("Choose Your Spell!", True, WHITE)
-        screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, 50))
-        
-        subtitle_font = pygame.font.Font(None, 30)
-        subtitle_text = subtitle_font.render("Click to select", True, WHITE)
-        screen.blit(subtitle_text, (WIDTH // 2 - subtitle_text.get_width() // 2, 110))
-        
+    def frame(self):
+        screen = get_screen()
+        self.clock.tick(MENU_FPS)
         mouse_pos = pygame.mouse.get_pos()
         
-        # Draw spell options
-        for rect, spell_key in spell_rects:
-            spell_info = SPELL_INFO[spell_key]
-            current_level = spell_manager.get_spell_level(spell_key)
-            
-            # Check if mouse is hovering
-            is_hovering = rect.collidepoint(mouse_pos)
-            border_color = (255, 215, 0) if is_hovering else WHITE
-            bg_color = (60, 60, 80) if is_hovering else (40, 40, 60)
-            
-            # Draw box
-            pygame.draw.rect(screen, bg_color, rect)
-            pygame.draw.rect(screen, border_color, rect, 3)
-            
-            # Draw spell name with level
-            name_font = pygame.font.Font(None, 32)
-            spell_name = spell_info['name']
-            if current_level > 0:
-                spell_name += f" Lv.{current_level}"
-            name_text = name_font.render(spell_name, True, WHITE)
-            screen.blit(name_text, (rect.centerx - name_text.get_width() // 2, rect.top + 15))
-            
-            # Draw combo
-            combo_font = pygame.font.Font(None, 24)
-            combo_text = combo_font.render(f"Combo: {spell_info['combo']}", True, (200, 200, 255))
-            screen.blit(combo_text, (rect.centerx - combo_text.get_width() // 2, rect.top + 50))
-            
-            # Draw upgrade info or description
-            desc_font = pygame.font.Font(None, 16)
-            if current_level > 0:
-                upgrade_text = desc_font.render("UPGRADE: More Power!", True, (100, 255, 100))
-                screen.blit(upgrade_text, (rect.centerx - upgrade_text.get_width() // 2, rect.top + 80))
-            else:
-                desc_text = desc_font.render(spell_info['description'], True, (180, 180, 180))
-                screen.blit(desc_text, (rect.centerx - desc_text.get_width() // 2, rect.top + 80))
-            
-            # Draw stats
-            stat_font = pygame.font.Font(None, 18)
-            y_offset = 105
-            if 'damage' in spell_info:
-                stat_text = stat_font.render(f"DMG: {spell_info['damage']}", True, (255, 100, 100))
-                screen.blit(stat_text, (rect.centerx - stat_text.get_width() // 2, rect.top + y_offset))
-                y_offset += 20
-            if 'duration' in spell_info:
-                stat_text = stat_font.render(f"Duration: {spell_info['duration']}s", True, (100, 200, 255))
-                screen.blit(stat_text, (rect.centerx - stat_text.get_width() // 2, rect.top + y_offset))
-                y_offset += 20
-            if 'cooldown' in spell_info:
-                stat_text = stat_font.render(f"CD: {spell_info['cooldown']}s", True, (200, 200, 100))
-                screen.blit(stat_text, (rect.centerx - stat_text.get_width() // 2, rect.top + y_offset))
+        # Redraw spell options whose hover state changed
+        dirty = self.menu.refresh(screen, mouse_pos)
         
         # Event handling
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                return None
+                return (QUIT, None)
             if event.type == pygame.MOUSEBUTTONDOWN:
-                for rect, spell_key in spell_rects:
-                    if rect.collidepoint(mouse_pos):
-                        selected_spell = spell_key
-                        break
+                for card, spell_key in self.spell_cards:
+                    if card.check_for_input(mouse_pos):
+                        # Unlock the selected spell
+                        self.spell_manager.unlock_spell(spell_key)
+                        return (POP, spell_key)
         
-        pygame.display.flip()
-    
-    # Unlock the selected spell
-    spell_manager.unlock_spell(selected_spell)
-    return selected_spell
-
-def play():
-    global EXP, LVL
-    running = True
-    timer = pygame.time.get_ticks()
-    clock = pygame.time.Clock()
-    wave = 1
-    spell_manager = SpellManager()
-    spell_effects = pygame.sprite.Group()  # For lightning, fireballs, freeze effects
-    last_spell_selection_level = 0
-    last_level_for_spawn_update = 0  # Track when we last updated spawn rates
+        if dirty:
+            pygame.display.update(dirty)
+        return None
+
+
+def spell_selection_menu(spell_manager):
+    """Show the spell choice and return the unlocked spell key (None if the window was closed)"""
+    return run_modal(SpellSelectionScene(spell_manager))
+
+def hud_text_blits(frame):
+    """(surface, position) pairs for the EXP, LVL and spell cooldown lines of the HUD"""
+    blits = [
+        (render_text(f"EXP: {frame.exp}", 30, WHITE), (10, 40)),
+        (render_text(f"LVL: {frame.level}", 30, WHITE), (10, 70)),
+    ]
     
-    while running:
-        current_time = pygame.time.get_ticks()
-        elapsed_time = current_time - timer
+    # Unlocked spells and cooldowns
+    spell_ui_y = 100
+    for spell_key, cooldown_remaining in frame.cooldowns:
+        spell_info = SPELL_INFO[spell_key]
         
+        # Display spell name and combo
+        if cooldown_remaining > 0:
+            cd_seconds = cooldown_remaining / 1000
+            spell_text = render_text(f"{spell_info['name']}: {cd_seconds:.1f}s", 20, (150, 150, 150))
+        else:
+            spell_text = render_text(f"{spell_info['name']}: {spell_info['combo']}", 20, (100, 255, 100))
+        blits.append((spell_text, (10, spell_ui_y)))
+        spell_ui_y += 25
+    return blits
+
+
+def draw_game(session, frame, alpha=1.0):
+    """Draw a FrameState of the session, report drawn regions to its renderer, and present it.
+
+    Moving sprites are drawn alpha of the way between their positions
+    before and after the last simulation step.
+    """
+    screen = get_screen()
+    renderer = session.renderer
+    profiler = session.profiler
+    quality = session.quality
+    current_time = frame.current_time
+    renderer.begin(screen) # Clear screen with dark background
+
+    # Draw the player, enemies and projectiles, one blits call each. Sprites of
+    # a kind share one cached surface, so the per-sprite cost is only the blit.
+    blit_centered(screen, *interpolated(frame.player, alpha), renderer)
+    blit_centered(screen, *interpolated(frame.enemies, alpha), renderer)
+    blit_centered(screen, *interpolated(frame.projectiles, alpha), renderer)
+    
+    # Draw spell effects, with as much detail as the quality governor allows
+    chain_bolts = 0
+    for effect in frame.effects:
+        if isinstance(effect, LightningSpell):
+            if effect.is_chain:
+                chain_bolts += 1
+                if quality.max_chain_bolts is not None and chain_bolts > quality.max_chain_bolts:
+                    continue
+            dirty = effect.draw(screen, quality.bolt_passes)
+        elif isinstance(effect, FreezeSpell):
+            dirty = effect.draw(screen, current_time, quality.rings)
+        elif isinstance(effect, FireballExplosion):
+            dirty = effect.draw(screen, current_time, quality.rings)
+        else:
+            continue
+        for rect in dirty:
+            renderer.add(rect)
+    
+    # Fireballs on top
+    blit_centered(screen, *interpolated(frame.fireballs, alpha), renderer)
+    profiler.mark('draw')
+
+    # Draw health bar
+    renderer.add(pygame.draw.rect(screen, RED, (10, 10, 100, 20)))
+    renderer.add(pygame.draw.rect(screen, GREEN, (10, 10, frame.health, 20)))
+    
+    # Draw EXP, LVL and spell cooldowns, refreshed every quality.hud_interval frames
+    if session.hud_blits is None or session.hud_age >= quality.hud_interval:
+        session.hud_blits = hud_text_blits(frame)
+        session.hud_age = 0
+    session.hud_age += 1
+    for rect in screen.blits(session.hud_blits):
+        renderer.add(rect)
+
+    # Frame profiler overlay (toggled with F3)
+    renderer.add(profiler.draw_overlay(screen))
+    profiler.mark('hud')
+
+    # Update the display
+    renderer.present()
+    profiler.mark('flip')
+
+
+class GameSession:
+    """State and per-tick logic of one game session.
+
+    clock is a RealClock (default) or a SimClock for uncapped simulation.
+    Headless sessions draw nothing. spell_picker, if given, is called with
+    the SpellManager instead of showing the selection menu and returns the
+    chosen spell key. renderer defaults to a FullRenderer, or a
+    DirtyRectRenderer when DIRTY_RECT_RENDERING is set. profiler defaults
+    to a FrameProfiler (F3 toggles its overlay, PROFILE_CSV names its CSV
+    dump), or a NullProfiler when headless.
+
+    All randomness comes from an RNG seeded with seed (SEED, or a random
+    seed, by default), and all player input from input_source (a LiveInput
+    by default). recorder, by default an InputRecorder to recording_path()
+    when RECORD_PATH is set, logs every clock read, tick input and spell
+    choice, so replay.py can re-run the session exactly. Headless sessions
+    default to an IdleInput and never open the game window.
+
+    Sessions whose input can press keys keep a RewindBuffer of recent
+    snapshots (see snapshot.py): Backspace rewinds one second, F5 and F9
+    quicksave and quickload, and dump_crash() saves the newest snapshot if
+    a tick raises. A recording logs the snapshot each F9 loaded, and a
+    session replaying it (input_source is a Replay) loads that one again
+    and never writes quicksaves.
+
+    play() and GameplayScene run a session until it ends; benchmarks and
+    tools can build one, set up entities directly and call tick()
+    themselves. Each tick() is one frame, which runs as many fixed
+    simulation steps (step()) as the clock calls for.
+
+    With threaded (THREADED_SIMULATION by default) the steps run on a
+    SimulationWorker thread while the main thread draws a FrameState of
+    the previous frame's result, which adds one frame of latency. The
+    session must then only be touched from tick() and finish(); input is
+    still polled on the main thread, through a QueuedInput.
+    """
+    enemy_types = (Enemy, TankEnemy, BossEnemy)  # Indexed by snapshots
+    projectile_type = Projectile
+
+    def __init__(self, clock=None, headless=False, spell_picker=None, renderer=None, profiler=None,
+                 seed=None, input_source=None, recorder=None, threaded=None):
+        if clock is None:
+            clock = RealClock()
+        if seed is None:
+            seed = SEED if SEED is not None else random.randrange(2 ** 63)
+        if input_source is None:
+            input_source = IdleInput() if headless else LiveInput()
+        if recorder is None and RECORD_PATH:
+            recorder = InputRecorder(recording_path(), seed, enemy_dmg)
+        if renderer is None:
+            renderer = DirtyRectRenderer(BACKGROUND) if DIRTY_RECT_RENDERING else FullRenderer(BACKGROUND)
+        if profiler is None:
+            profiler = NullProfiler() if headless else FrameProfiler(csv_path=PROFILE_CSV)
+        if threaded is None:
+            threaded = THREADED_SIMULATION
+        replay = input_source if isinstance(input_source, Replay) else None
+        # Recent snapshots for Backspace rewinds and crash dumps
+        rewind = None if isinstance(input_source, IdleInput) else RewindBuffer(REWIND_CAPACITY, steps_per(REWIND_INTERVAL))
+        if threaded:
+            input_source = QueuedInput(input_source)
+        if not headless:
+            get_screen()  # Before the clock is read, since pygame.init() starts it
+        self.clock = clock
+        self.headless = headless
+        self.spell_picker = spell_picker
+        self.renderer = renderer
+        self.profiler = profiler
+        # Phase marks from a worker thread would interleave with the main thread's
+        self.step_profiler = NullProfiler() if threaded else profiler
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.input_source = input_source
+        self.replay = replay  # Source of quickloaded snapshots when replaying
+        self.recorder = recorder
+        self.running = True
+        self.game_over = False  # Set when the player dies
+        self.timer = self.read_clock()
+        self.current_time = self.timer  # Game time, advanced by step()
+        self.sim_time = float(self.timer)  # Unrounded game time
+        self.step_ms = 1000 / SIM_RATE
+        self.move_scale = 60 / SIM_RATE  # Speeds are in pixels per 1/60 s, contact damage per 1/60 s too
+        self.hit_prune_steps = steps_per(HIT_PRUNE_INTERVAL)
+        self.last_frame_time = self.timer  # Clock time of the previous frame
+        self.accumulator = 0.0  # Clock time not yet simulated
+        self.frames = 0
+        self.skipped_renders = 0  # Renders skipped in a row
+        self.total_skipped_renders = 0
+        self.quality = QualityGovernor(fixed_level=QUALITY)  # Visual detail, lowered when frames run long
+        self.hud_blits = None  # HUD text, rebuilt every quality.hud_interval frames
+        self.hud_age = 0
+        self.mouse_pos = (0, 0)  # As of the last tick's input
+        self.bounds = SCREEN_RECT  # Play area
+
+        # Player, sprite groups and progress
+        self.player = Player()
+        self.player_group = pygame.sprite.Group(self.player)
+        self.enemies = EnemyGroup()  # Positions, speeds and health kept in NumPy arrays
+        self.projectiles = pygame.sprite.Group()
+        self.exp = 0
+        self.level = 1
+        self.level_times = []  # Session milliseconds at which each level after the first was reached
+        self.wave = 1
+        self.scheduler = Scheduler(self.timer)  # Spawns, cooldowns and effect lifetimes, owned by this session
+        self.spell_manager = SpellManager(self.scheduler)
+        self.spell_effects = EffectGroup(self.scheduler)  # For lightning, fireballs, freeze effects
+        self.enemy_grid = SpatialHash()  # Enemy positions for area queries, rebuilt every tick
+        self.status_effects = StatusEffects()  # Timed slows from freeze fields
+        self.damage = DamageBuffer(self.enemies)  # Hits queued by spells and collisions each tick
+        self.last_spell_selection_level = 0
+        self.last_level_for_spawn_update = 0  # Track when we last updated spawn rates
+        self.ticks = 0  # Simulation steps
+        self.start = time.perf_counter()
+        self.rewind = rewind
+        self.memory_audit = MemoryAudit() if MEMORY_AUDIT else None  # Reports memory growth each wave
+        self.metrics = metrics
+
+        # Spawning and the automatic projectile
+        self.enemy_spawner = self.scheduler.call_every(SPAWNRATE, self.spawn_enemy, Enemy)
+        self.tank_spawner = self.scheduler.call_every(SPAWNRATE * 2, self.spawn_enemy, TankEnemy)  # Spawn tank enemies less frequently
+        self.fire_timer = self.scheduler.call_every(FIRE_RATE, self.fire_projectile)
+        self.worker = SimulationWorker(self) if threaded else None
+
+    def read_clock(self):
+        """Current game time, logged to the recorder if there is one"""
+        current_time = self.clock.get_ticks()
+        if self.recorder is not None:
+            self.recorder.record_time(current_time)
+        return current_time
+
+    def tick(self):
+        """Run one frame: the simulation steps that are due on the clock, then a render.
+
+        Game time advances a fixed step_ms per simulation step, however
+        long frames take. A slow frame is made up for by running several
+        steps in the next one, without drawing in between; renders are
+        skipped (up to MAX_FRAME_SKIP in a row) while the simulation is
+        still behind, and only beyond MAX_STEPS_PER_FRAME steps per frame
+        does the game itself slow down. The time each frame takes is fed
+        to the quality governor. Sets running to False when the session
+        ends.
+
+        With a worker, the steps started by the previous tick are waited
+        for first, and this frame's steps run in the background while the
+        state they started from is drawn.
+        """
+        profiler = self.profiler
+        profiler.begin_frame()
+        self.clock.tick() # 60 FPS on the real clock, uncapped on a SimClock
+        profiler.mark('wait')
+        work_start = time.perf_counter()
+        worker = self.worker
+        if worker is not None:
+            worker.wait()  # The steps it started ran during the last draw and the wait above
+            profiler.mark('sync')
+            frame = FrameState(self)
+            alpha = min(1.0, self.accumulator / self.step_ms)
+        if self.metrics is not None:
+            self.metrics.sample(self)  # No steps are running here
+
+        frame_time = self.read_clock()
+        self.accumulator += frame_time - self.last_frame_time
+        self.last_frame_time = frame_time
+        if worker is not None:
+            steps = min(int(self.accumulator // self.step_ms), MAX_STEPS_PER_FRAME) if self.running else 0
+            self.accumulator -= steps * self.step_ms
+            self.input_source.fill(steps)
+            worker.start(steps)
+        else:
+            steps = 0
+            while self.running and self.accumulator >= self.step_ms and steps < MAX_STEPS_PER_FRAME:
+                self.step()
+                self.accumulator -= self.step_ms
+                steps += 1
+        behind = self.accumulator >= self.step_ms
+        # Drop time the simulation cannot catch up on, rather than spiralling
+        self.accumulator = min(self.accumulator, MAX_STEPS_PER_FRAME * self.step_ms)
+        self.frames += 1
+
+        if not self.headless:
+            if behind and self.skipped_renders < MAX_FRAME_SKIP:
+                self.skipped_renders += 1
+                self.total_skipped_renders += 1
+            else:
+                self.skipped_renders = 0
+                if worker is None:
+                    frame = FrameState(self)
+                    alpha = min(1.0, self.accumulator / self.step_ms)
+                draw_game(self, frame, alpha)
+        frame_ms = (time.perf_counter() - work_start) * 1000
+        if not self.headless:
+            self.quality.record(frame_ms)
+        if self.metrics is not None:
+            self.metrics.record_frame(frame_ms)
+        profiler.end_frame()
+
+    def step(self):
+        """Advance the simulation by one fixed step of step_ms"""
+        profiler = self.step_profiler
+        renderer = self.renderer
+        spell_manager = self.spell_manager
+        spell_effects = self.spell_effects
+        enemy_grid = self.enemy_grid
+        status_effects = self.status_effects
+        damage = self.damage
+        spell_picker = self.spell_picker
+        player = self.player
+        enemies = self.enemies
+        projectiles = self.projectiles
+
+        self.sim_time += self.step_ms
+        current_time = self.current_time = int(self.sim_time)
+        elapsed_time = current_time - self.timer
+    
         # Show spell selection menu every 3 levels (3, 6, 9, 12, etc.)
-        if LVL >= 3 and LVL % 3 == 0 and LVL != last_spell_selection_level:
-            spell_selection_menu(spell_manager)
-            last_spell_selection_level = LVL
-        
+        if self.level >= 3 and self.level % 3 == 0 and self.level != self.last_spell_selection_level:
+            if spell_picker is None:
+                spell_name = self.on_main_thread(spell_selection_menu, spell_manager)
+                renderer.invalidate()  # The menu drew over the whole screen
+                if spell_name is None:
+                    self.running = False  # Window closed during the menu
+                    return
+            else:
+                spell_name = spell_picker(spell_manager)
+                spell_manager.unlock_spell(spell_name)
+            if self.recorder is not None:
+                self.recorder.record_spell(spell_name)
+            self.last_spell_selection_level = self.level
+    
         # Update tank spawn rate based on player level (after level 5)
-        if LVL >= 5 and LVL != last_level_for_spawn_update:
+        if self.level >= 5 and self.level != self.last_level_for_spawn_update:
             # Increase tank spawn frequency as player levels up
             # Base: every 4 seconds, reduce by 100ms per level (minimum 1 second)
-            tank_spawn_rate = max(1000, SPAWNRATE * 2 - (LVL - 5) * 100)
-            pygame.time.set_timer(SPAWN_TANK_ENEMY, tank_spawn_rate)
-            last_level_for_spawn_update = LVL
-        
-        if elapsed_time > NEXT_WAVE_TIME + (wave - 1) * 10000:
-            pygame.time.set_timer(SPAWN_ENEMY, SPAWNRATE // 2)
-            wave += 1  # Increase spawn rate after 30 seconds
-        clock.tick(60) # 60 FPS
-        
+            tank_spawn_rate = max(1000, SPAWNRATE * 2 - (self.level - 5) * 100)
+            self.tank_spawner.cancel()
+            self.tank_spawner = self.scheduler.call_every(tank_spawn_rate, self.spawn_enemy, TankEnemy, start=current_time + tank_spawn_rate)
+            self.last_level_for_spawn_update = self.level
+    
+        if elapsed_time > NEXT_WAVE_TIME + (self.wave - 1) * 10000:
+            self.enemy_spawner.cancel()
+            self.enemy_spawner = self.scheduler.call_every(SPAWNRATE // 2, self.spawn_enemy, Enemy, start=current_time + SPAWNRATE // 2)
+            self.wave += 1  # Increase spawn rate after 30 seconds
+            if self.memory_audit is not None:
+                self.memory_audit.snapshot(f"wave {self.wave}")
+        self.ticks += 1
+    
         # Update spell manager
         spell_manager.update(current_time)
-        
-        screen.fill((30, 30, 30)) # Clear screen with dark background
-        # Get pressed keys
-        keys = pygame.key.get_pressed()
+    
+        # Pressed keys, mouse position and events
+        tick_input = self.input_source.poll()
+        if self.recorder is not None:
+            self.recorder.record_input(tick_input)
+        keys = tick_input.keys
+        self.mouse_pos = tick_input.mouse_pos
+        if tick_input.quit_requested:
+            self.running = False
 
-        # Event handling
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            
-            # Track key presses for spell combos
-            elif event.type == pygame.KEYDOWN:
-                spell_manager.add_key_to_combo(event.key, current_time)
-
-            # Spawn enemy event
-            elif event.type == SPAWN_ENEMY:
-                enemies.add(Enemy(player))
-
-            # Spawn tank enemy event (only if player is level 5 or above)
-            elif event.type == SPAWN_TANK_ENEMY:
-                if LVL >= 5:
-                    enemies.add(TankEnemy(player))
-
-            # Fire projectile event
-            elif event.type == FIRE_PROJECTILE:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                dx = mouse_x - player.rect.centerx
-                dy = mouse_y - player.rect.centery
-                dist = math.hypot(dx, dy)
-                if dist == 0:
-                    dist = 1
-                direction = (dx / dist, dy / dist)
-                # Projectile size increases with level
-                proj_size = PROJECTILE_SIZE + (LVL - 1) * 2
-                projectiles.add(Projectile(player.rect.center, direction, proj_size))
-        
-        # Check for spell combos
-        if spell_manager.check_lightning_combo(current_time):
-            mouse_pos = pygame.mouse.get_pos()
-            upgrade_level = spell_manager.get_spell_level('lightning')
-            lightning = LightningSpell(player.rect.center, mouse_pos, upgrade_level)
-            spell_effects.add(lightning)
-        
-        if spell_manager.check_fireball_combo(current_time):
-            mouse_pos = pygame.mouse.get_pos()
-            dx = mouse_pos[0] - player.rect.centerx
-            dy = mouse_pos[1] - player.rect.centery
-            dist = math.hypot(dx, dy)
-            if dist == 0:
-                dist = 1
-            direction = (dx / dist, dy / dist)
-            upgrade_level = spell_manager.get_spell_level('fireball')
-            fireball = FireballSpell(player.rect.center, direction, upgrade_level)
-            spell_effects.add(fireball)
-        
-        if spell_manager.check_freeze_combo(current_time):
-            upgrade_level = spell_manager.get_spell_level('freeze')
-            freeze = FreezeSpell(player.rect.center, upgrade_level)
-            spell_effects.add(freeze)
-            
-            # Grant bonus health for level 2+ freeze spell
-            if upgrade_level >= 2:
-                health_bonus = (upgrade_level - 1) * 5  # 5 health per level above 1
-                player.health = min(100, player.health + health_bonus)  # Cap at 100
+        # Track key presses for spell combos
+        cast = []  # Spells whose combos completed this frame
+        for key in tick_input.key_presses:
+            if key == pygame.K_F3:
+                self.profiler.show_overlay = not self.profiler.show_overlay
+            elif key == pygame.K_F5:
+                if self.replay is None:  # Replays leave the player's quicksave alone
+                    save(self, QUICKSAVE_PATH)
+            elif key == pygame.K_F9:
+                self.quickload()
+            elif key == pygame.K_BACKSPACE and self.rewind is not None:
+                self.rewind.rewind(self, REWIND_STEPS)
+            spell_name = spell_manager.add_key_to_combo(key, current_time)
+            if spell_name:
+                cast.append(spell_name)
+    
+        profiler.mark('events')
+    
+        # Cast spells whose combos completed this frame
+        for spell_name in cast:
+            self.cast_spell(spell_name, current_time)
+        profiler.mark('combos')
 
         # Update all sprite groups
-        player_group.update(keys)
-        enemies.update()
-        projectiles.update()
-        
-        # Update spell effects
-        for effect in spell_effects:
-            if isinstance(effect, LightningSpell):
-                effect.update(current_time)
-            elif isinstance(effect, FireballSpell):
-                effect.update(current_time, screen.get_rect())
-            elif isinstance(effect, FreezeSpell):
-                effect.update(current_time)
-            elif isinstance(effect, FireballExplosion):
-                effect.update(current_time)
+        move_scale = self.move_scale
+        self.player_group.update(keys, move_scale)
+        enemies.update(player.rect.center, move_scale)
+        projectiles.update(move_scale)
+        enemy_grid.rebuild(enemies)
+    
+        # Fire due spawns, cooldown expiries, effect deaths and explosion damage ticks
+        self.scheduler.run_until(current_time)
 
+        # Move fireballs (the only effects that move)
+        spell_effects.update(self.bounds, move_scale)
+        profiler.mark('updates')
 
-        # Spell effects on enemies
+        # Spell effects on enemies (damage is queued and resolved in one pass below)
         for effect in spell_effects:
             if isinstance(effect, LightningSpell):
                 # Skip chain lightning (visual only, damage already applied)
                 if hasattr(effect, 'is_chain') and effect.is_chain:
                     continue
-                    
-                for enemy in enemies:
+                
+                for enemy in enemy_grid.query_path(effect.segments, LIGHTNING_HIT_RADIUS):
                     if effect.check_hit(enemy):
-                        enemy.health -= effect.damage
-                        if enemy.health <= 0:
-                            enemy.kill()
-                            # Give XP based on enemy type
-                            if isinstance(enemy, BossEnemy):
-                                EXP += 10
-                            elif isinstance(enemy, TankEnemy):
-                                EXP += 3
-                            else:
-                                EXP += 1
-            
+                        damage.emit(enemy, effect.damage, 'lightning')
+        
             elif isinstance(effect, FireballSpell):
                 hit_enemies = pygame.sprite.spritecollide(effect, enemies, False)
                 if hit_enemies:
                     # If fireball is level 2+, create explosion on first hit
                     if effect.upgrade_level >= 2 and len(effect.hit_enemies) == 0:
                         explosion_pos = hit_enemies[0].rect.center
-                        explosion = FireballExplosion(explosion_pos, effect.upgrade_level)
+                        explosion = FireballExplosion(explosion_pos, effect.upgrade_level, current_time)
                         spell_effects.add(explosion)
+                        spell_effects.call_every(explosion, explosion.tick_rate, self.explosion_damage, explosion,
+                                                 start=current_time + explosion.tick_rate)
                         effect.kill()  # Destroy fireball after creating explosion
                     else:
                         # Normal fireball behavior for level 1 or after explosion created
                         for enemy in hit_enemies:
-                            enemy_id = id(enemy)
                             # Only damage each enemy once
-                            if enemy_id not in effect.hit_enemies:
-                                effect.hit_enemies.add(enemy_id)
-                                if isinstance(enemy, BossEnemy):
-                                    enemy.health -= effect.damage
-                                    if enemy.health <= 0:
-                                        enemy.kill()
-                                        EXP += 10
-                                elif isinstance(enemy, TankEnemy):
-                                    enemy.health -= effect.damage
-                                    if enemy.health <= 0:
-                                        enemy.kill()
-                                        EXP += 3
-                                else:
-                                    enemy.kill()
-                                    EXP += 1
-            
-            elif isinstance(effect, FireballExplosion):
-                # Deal damage over time to enemies in the explosion area
-                if effect.should_damage_now(current_time):
-                    damage_dealt = False
-                    for enemy in enemies:
-                        if effect.is_in_range((enemy.rect.centerx, enemy.rect.centery)):
-                            damage_dealt = True
-                            if isinstance(enemy, BossEnemy):
-                                enemy.health -= effect.damage_per_tick
-                                if enemy.health <= 0:
-                                    enemy.kill()
-                                    EXP += 10
-                            elif isinstance(enemy, TankEnemy):
-                                enemy.health -= effect.damage_per_tick
-                                if enemy.health <= 0:
-                                    enemy.kill()
-                                    EXP += 3
-                            else:
-                                # Regular enemies take full damage from DoT (instant kill on tick)
-                                enemy.kill()
-                                EXP += 1
-                    
-                    # Reset timer after dealing damage
-                    if damage_dealt:
-                        effect.reset_damage_timer(current_time)
-            
-            elif isinstance(effect, FreezeSpell):
-                for enemy in enemies:
-                    if effect.is_in_range((enemy.rect.centerx, enemy.rect.centery)):
-                        effect.freeze_enemy(enemy)
+                            if enemy.uid not in effect.hit_enemies:
+                                effect.hit_enemies.add(enemy.uid)
+                                damage.emit(enemy, effect.damage, 'fireball')
         
-        # Reset enemy speeds if freeze effect expires
-        for enemy in enemies:
-            if hasattr(enemy, 'speed_multiplier'):
-                # Check if any freeze effect is affecting this enemy
-                frozen = False
-                for effect in spell_effects:
-                    if isinstance(effect, FreezeSpell):
-                        if effect.is_in_range((enemy.rect.centerx, enemy.rect.centery)):
-                            frozen = True
-                            break
-                if not frozen:
-                    enemy.speed_multiplier = 1.0
+            elif isinstance(effect, FreezeSpell):
+                # Enemies the field already slowed stay slowed until it expires, so only newcomers are touched
+                for enemy in enemies.store.within(effect.center_pos, effect.radius, effect.affected_enemies):
+                    effect.freeze_enemy(enemy, status_effects)
+
+        # Remove enemies killed by spells before projectiles can collide with them
+        self.exp += damage.resolve()
+        profiler.mark('spells')
+    
+        # Restore enemy speeds once their freeze slows expire
+        status_effects.update(current_time)
+        profiler.mark('status')
 
         # Collision detection for projectiles hitting enemies
         for e in pygame.sprite.groupcollide(enemies, projectiles, False, True):
             # Lightning chain effect if lightning spell is upgraded to level 2+
             lightning_level = spell_manager.get_spell_level('lightning')
             if lightning_level >= 2:
-                # Create chain lightning from hit enemy to nearby enemies
-                chain_targets = []
-                for other_enemy in enemies:
-                    if other_enemy != e:
-                        dist = math.hypot(
-                            other_enemy.rect.centerx - e.rect.centerx,
-                            other_enemy.rect.centery - e.rect.centery
-                        )
-                        if dist < 150:  # Chain range
-                            chain_targets.append((dist, other_enemy))
-                
-                # Sort by distance and chain to closest enemies
-                chain_targets.sort(key=lambda x: x[0])
-                num_chains = min(lightning_level - 1, len(chain_targets))  # Level 2 = 1 chain, Level 3 = 2 chains, etc.
-                
-                for i in range(num_chains):
-                    target_enemy = chain_targets[i][1]
-                    # Only damage if enemy is still alive
-                    if target_enemy.alive():
-                        # Deal 1 damage to chained enemy (works for all enemy types now)
-                        target_enemy.health -= 1
-                        if target_enemy.health <= 0:
-                            target_enemy.kill()
-                            # Give XP based on enemy type
-                            if isinstance(target_enemy, BossEnemy):
-                                EXP += 10
-                            elif isinstance(target_enemy, TankEnemy):
-                                EXP += 3
-                            else:
-                                EXP += 1
-                        
-                        # Create mini lightning visual effect (mark as chain for visual only)
-                        mini_lightning = LightningSpell(e.rect.center, target_enemy.rect.center, 1, is_chain=True)
-                        spell_effects.add(mini_lightning)
+                # Chain to the closest enemies: Level 2 = 1 chain, Level 3 = 2 chains, etc.
+                # Enemies already dealt lethal damage this tick are dead, as far as chaining goes
+                chain_targets = enemy_grid.nearest(e.rect.center, lightning_level - 1, CHAIN_RANGE, exclude=e,
+                                                   skip=damage.is_lethal)
             
-            # Damage enemy based on type (all enemies now have health)
-            e.health -= 1
-            if e.health <= 0:
-                e.kill()
-                # Give XP based on enemy type
-                if isinstance(e, BossEnemy):
-                    EXP += 10
-                elif isinstance(e, TankEnemy):
-                    EXP += 3
-                else:
-                    EXP += 1
-            
-            # Check for level up
-            old_lvl = LVL
-            if EXP >= LVL * 5:
-                LVL += 1
-                EXP = 0
-                player.health += 10  # Heal player on level up
-                # Projectile size increases by 2 pixels per level (handled in projectile creation)
+                for dist, target_enemy in chain_targets:
+                    # Deal 1 damage to chained enemy (works for all enemy types now)
+                    damage.emit(target_enemy, 1, 'chain')
                 
-                # Spawn boss every 10 levels, plus extra bosses more frequently at higher levels
-                if LVL % 10 == 0:
-                    enemies.add(BossEnemy(player))
-                    # At level 20+, multiples of 10 get an extra boss
-                    if LVL >= 20:
-                        enemies.add(BossEnemy(player))
-                # After level 20, spawn additional bosses every 5 levels (25, 35, 45, etc.)
-                elif LVL >= 20 and LVL % 5 == 0:
-                    enemies.add(BossEnemy(player))
+                    # Create mini lightning visual effect (mark as chain for visual only)
+                    mini_lightning = LightningSpell(e.rect.center, target_enemy.rect.center, 1, is_chain=True,
+                                                    current_time=current_time, rng=self.rng)
+                    spell_effects.add(mini_lightning)
+        
+            # Damage enemy based on type (all enemies now have health)
+            damage.emit(e, 1, 'projectile')
 
+        self.exp += damage.resolve()
+        
+        # Check for level up
+        if self.exp >= self.level * 5:
+            self.level += 1
+            self.exp = 0
+            self.level_times.append(current_time - self.timer)
+            player.health += 10  # Heal player on level up
+            # Projectile size increases by 2 pixels per level (handled in projectile creation)
+        
+            # Spawn boss every 10 levels, plus extra bosses more frequently at higher levels
+            if self.level % 10 == 0:
+                enemies.add(BossEnemy.pool.acquire(player, self.rng))
+                # At level 20+, multiples of 10 get an extra boss
+                if self.level >= 20:
+                    enemies.add(BossEnemy.pool.acquire(player, self.rng))
+            # After level 20, spawn additional bosses every 5 levels (25, 35, 45, etc.)
+            elif self.level >= 20 and self.level % 5 == 0:
+                enemies.add(BossEnemy.pool.acquire(player, self.rng))
 
         # Check for collisions between player and enemies
         if pygame.sprite.spritecollideany(player, enemies):
-            player.health -= enemy_dmg
+            player.health -= enemy_dmg * self.move_scale  # The same damage per second at any SIM_RATE
             if player.health <= 0:
-                print("Game Over")
-                running = False
-        
-        # Draw all sprite groups
-        player_group.draw(screen)
-        enemies.draw(screen)
-        projectiles.draw(screen)
-        
-        # Draw spell effects
-        for effect in spell_effects:
-            if isinstance(effect, LightningSpell):
-                effect.draw(screen)
-            elif isinstance(effect, FreezeSpell):
-                effect.draw(screen, current_time)
-            elif isinstance(effect, FireballExplosion):
-                effect.draw(screen, current_time)
-        
-        # Spell effects are sprites, so fireballs draw automatically via the group
-        spell_effects.draw(screen)
+                if not self.headless:
+                    print("Game Over")
+                self.game_over = True
+                self.running = False
+        profiler.mark('collisions')
 
-        # Draw health bar
-        pygame.draw.rect(screen, RED, (10, 10, 100, 20))
-        pygame.draw.rect(screen, GREEN, (10, 10, player.health, 20))
-        
-        # Draw EXP and LVL
-        font = pygame.font.Font(None, 30)
-        exp_text = font.render(f"EXP: {EXP}", True, WHITE)
-        lvl_text = font.render(f"LVL: {LVL}", True, WHITE)
-        screen.blit(exp_text, (10, 40))
-        screen.blit(lvl_text, (10, 70))
-        
-        # Draw unlocked spells and cooldowns
-        if spell_manager.unlocked_spells:
-            spell_ui_y = 100
-            small_font = pygame.font.Font(None, 20)
-            for spell_key in spell_manager.unlocked_spells:
-                spell_info = SPELL_INFO[spell_key]
-                
-                # Determine cooldown
-                cooldown_remaining = 0
-                if spell_key == 'lightning':
-                    cooldown_remaining = spell_manager.lightning_cooldown
-                elif spell_key == 'fireball':
-                    cooldown_remaining = spell_manager.fireball_cooldown
-                elif spell_key == 'freeze':
-                    cooldown_remaining = spell_manager.freeze_cooldown
-                
-                # Display spell name and combo
-                if cooldown_remaining > 0:
-                    cd_seconds = cooldown_remaining / 1000
-                    spell_text = small_font.render(f"{spell_info['name']}: {cd_seconds:.1f}s", True, (150, 150, 150))
-                else:
-                    spell_text = small_font.render(f"{spell_info['name']}: {spell_info['combo']}", True, (100, 255, 100))
-                
-                screen.blit(spell_text, (10, spell_ui_y))
-                spell_ui_y += 25
+        # Effects remember the enemies they hit by uid; drop the ones that died
+        if self.ticks % self.hit_prune_steps == 0:
+            spell_effects.prune_hits({enemy.uid for enemy in enemies})
+
+        if self.rewind is not None:
+            self.rewind.record(self)
+        profiler.mark('snapshot')
+
+    def on_main_thread(self, function, *args):
+        """Call function (a menu) from a step on the thread that owns the window, and return its result"""
+        if self.worker is None:
+            return function(*args)
+        return self.worker.call_on_main(function, *args)
+
+    def spawn_enemy(self, enemy_class):
+        """Scheduled spawn of one enemy (tank enemies only spawn from level 5)"""
+        if enemy_class is TankEnemy and self.level < 5:
+            return
+        self.enemies.add(enemy_class.pool.acquire(self.player, self.rng))
+
+    def fire_projectile(self):
+        """Scheduled automatic shot towards the mouse"""
+        mouse_x, mouse_y = self.mouse_pos
+        dx = mouse_x - self.player.rect.centerx
+        dy = mouse_y - self.player.rect.centery
+        dist = math.hypot(dx, dy)
+        if dist == 0:
+            dist = 1
+        direction = (dx / dist, dy / dist)
+        # Projectile size increases with level
+        proj_size = PROJECTILE_SIZE + (self.level - 1) * 2
+        self.projectiles.add(Projectile.pool.acquire(self.player.rect.center, direction, proj_size))
+
+    def explosion_damage(self, explosion):
+        """Scheduled damage tick to every enemy in a fireball explosion"""
+        for enemy in self.enemy_grid.query_radius(explosion.center_pos, explosion.radius):
+            self.damage.emit(enemy, explosion.damage_per_tick, 'explosion')
+
+    def cast_spell(self, spell_name, current_time):
+        """Create the effect for a spell whose combo was just completed"""
+        if self.metrics is not None:
+            self.metrics.count_cast(spell_name)
+        upgrade_level = self.spell_manager.get_spell_level(spell_name)
+        mouse_pos = self.mouse_pos
+        if spell_name == 'lightning':
+            lightning = LightningSpell(self.player.rect.center, mouse_pos, upgrade_level, current_time=current_time, rng=self.rng)
+            self.spell_effects.add(lightning)
     
-        # Update the display
-        pygame.display.flip()
+        elif spell_name == 'fireball':
+            dx = mouse_pos[0] - self.player.rect.centerx
+            dy = mouse_pos[1] - self.player.rect.centery
+            dist = math.hypot(dx, dy)
+            if dist == 0:
+                dist = 1
+            direction = (dx / dist, dy / dist)
+            fireball = FireballSpell.pool.acquire(self.player.rect.center, direction, upgrade_level, current_time)
+            self.spell_effects.add(fireball)
     
-    # Reset game state after death
-    player.health = 100  # Reset player health for next game
-    player.rect.center = (WIDTH // 2, HEIGHT // 2)  # Reset player position
-    enemies.empty()  # Clear enemies
-    projectiles.empty()  # Clear projectiles
-    EXP = 0  # Reset experience
-    LVL = 1  # Reset level
-    main_menu()
-    # ...existing code...
+        elif spell_name == 'freeze':
+            freeze = FreezeSpell(self.player.rect.center, upgrade_level, current_time)
+            self.spell_effects.add(freeze)
+        
+            # Grant bonus health for level 2+ freeze spell
+            if upgrade_level >= 2:
+                health_bonus = (upgrade_level - 1) * 5  # 5 health per level above 1
+                self.player.health = min(100, self.player.health + health_bonus)  # Cap at 100
+
+    def quickload(self):
+        """Restore the quicksave, or when replaying the snapshot the recording loaded at this point"""
+        if self.replay is not None:
+            data = self.replay.quickload()
+        else:
+            try:
+                data = read(QUICKSAVE_PATH)
+            except OSError as e:
+                print(f"Could not load {QUICKSAVE_PATH}: {e}")
+                data = None
+            if self.recorder is not None:
+                self.recorder.record_quickload(data)
+        if data is not None:
+            try:
+                restore(self, data)
+            except ValueError as e:
+                print(f"Could not load {QUICKSAVE_PATH}: {e}")
+
+    def dump_crash(self):
+        """After an exception in a tick, write the newest rewind snapshot to CRASH_DUMP_PATH"""
+        if self.worker is not None:
+            self.worker.stop()  # Let steps in flight finish before reading their snapshots
+        if self.rewind is not None and self.rewind.dump(CRASH_DUMP_PATH):
+            print(f"Saved the last snapshot before the crash to {CRASH_DUMP_PATH}")
+
+    def finish(self):
+        """Stop the session, release its sprites and return its stats"""
+        if self.worker is not None:
+            self.worker.stop()
+        if self.memory_audit is not None:
+            self.memory_audit.close()
+        self.profiler.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        self.scheduler.clear()  # Nothing scheduled by this session fires after it ends
+        for group in (self.spell_effects, self.enemies, self.projectiles):
+            for sprite in group.sprites():
+                sprite.kill()  # Back to their pools for the next session
+        wall_seconds = time.perf_counter() - self.start
+        stats = {
+            'ticks': self.ticks,
+            'frames': self.frames,
+            'skipped_renders': self.total_skipped_renders,
+            'sim_ms': self.current_time - self.timer,
+            'wall_seconds': wall_seconds,
+            'ticks_per_second': self.ticks / wall_seconds if wall_seconds > 0 else 0.0,
+            'level': self.level,
+            'exp': self.exp,
+            'wave': self.wave,
+            'game_over': self.game_over,
+            'level_times': self.level_times,
+        }
+        return stats
+
+
+def play(clock=None, headless=False, spell_picker=None, max_ticks=None, renderer=None, profiler=None, seed=None):
+    """Run one game session to its end and return its stats (see GameSession for the arguments).
+
+    max_ticks ends the session early. The interactive game runs sessions
+    through GameplayScene instead.
+    """
+    session = GameSession(clock, headless, spell_picker, renderer, profiler, seed)
+    try:
+        while session.running:
+            session.tick()
+            if max_ticks is not None and session.ticks >= max_ticks:
+                break
+    except Exception:
+        session.dump_crash()
+        raise
+    return session.finish()
+
+
+class GameplayScene(Scene):
+    """One game session, followed by a fresh main menu.
+
+    The session only exists between enter() and exit(), so nothing of it
+    (sprites, scheduled timers, the worker thread) outlives the scene.
+    """
+    def __init__(self, clock=None, spell_picker=None, max_ticks=None, seed=None):
+        self.clock = clock
+        self.spell_picker = spell_picker
+        self.max_ticks = max_ticks
+        self.seed = seed
+        self.session = None
+        self.stats = None
+
+    def enter(self):
+        self.session = GameSession(self.clock, spell_picker=self.spell_picker, seed=self.seed)
+
+    def frame(self):
+        session = self.session
+        try:
+            session.tick()
+        except Exception:
+            session.dump_crash()
+            raise
+        if session.running and (self.max_ticks is None or session.ticks < self.max_ticks):
+            return None
+        return (SWITCH, MainMenuScene())
+
+    def exit(self):
+        if self.session is not None:
+            self.stats = self.session.finish()
+            self.session = None
 
 
 # --- Main game loop ---
 def main():
-    main_menu()
+    global DIRTY_RECT_RENDERING, PROFILE_CSV, SEED, RECORD_PATH, QUALITY, THREADED_SIMULATION, MEMORY_AUDIT
+    global METRICS_PORT, metrics
+    parser = argparse.ArgumentParser(description="Spellwalk")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="update only changed screen regions (faster on software-rendered hosts)")
+    parser.add_argument("--profile-csv", metavar="PATH",
+                        help="write per-frame phase timings to PATH when a session ends")
+    parser.add_argument("--seed", type=int, help="seed for spawns and lightning paths")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record each session's inputs for replay.py, the first to PATH and later ones to PATH-2, PATH-3, ...")
+    parser.add_argument("--threaded", action="store_true",
+                        help="run the simulation on a background thread, overlapped with drawing (one frame more latency)")
+    parser.add_argument("--memory-audit", action="store_true",
+                        help="print the top memory growth sites every wave (slows the game down)")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--quality", choices=('auto',) + QUALITY_NAMES, default='auto',
+                        help="visual quality (auto lowers it while frames run over budget)")
+    args = parser.parse_args()
+    QUALITY = None if args.quality == 'auto' else QUALITY_NAMES.index(args.quality)
+    DIRTY_RECT_RENDERING = args.dirty_rects
+    THREADED_SIMULATION = args.threaded
+    MEMORY_AUDIT = args.memory_audit
+    METRICS_PORT = args.metrics_port
+    PROFILE_CSV = args.profile_csv
+    SEED = args.seed
+    RECORD_PATH = args.record
+    if METRICS_PORT is not None:
+        metrics = MetricsExporter(METRICS_PORT)
+        print(f"Serving metrics on http://127.0.0.1:{metrics.port}/metrics")
+    SceneManager().run(MainMenuScene())
+    if metrics is not None:
+        metrics.close()
+    pygame.quit()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
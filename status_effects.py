@@ -0,0 +1,51 @@
+import heapq
+import itertools
+
+
+class StatusEffects:
+    """Timed slows on enemies, expired in order from a heap.
+
+    Each slow has a source (the spell that applied it) and an expiry time.
+    An enemy's speed_multiplier is its strongest active slow, or 1.0 once
+    every slow has expired. update() only touches slows that are due, so
+    its cost follows the number of status changes rather than the number
+    of enemies or effects on screen. Slows are keyed by enemy uid, so a
+    pooled enemy that is recycled for a new spawn does not inherit them.
+    """
+    def __init__(self):
+        self.slows = {}  # enemy uid: {source: (multiplier, expires_at)}
+        self._expiry = []  # Heap of (expires_at, seq, uid, enemy, source)
+        self._seq = itertools.count()  # Tie-breaker so the heap never compares sprites
+
+    def apply_slow(self, enemy, multiplier, source, expires_at):
+        """Slow enemy by multiplier until expires_at (re-applying a source replaces it)"""
+        active = self.slows.setdefault(enemy.uid, {})
+        active[source] = (multiplier, expires_at)
+        heapq.heappush(self._expiry, (expires_at, next(self._seq), enemy.uid, enemy, source))
+        enemy.speed_multiplier = min(m for m, _ in active.values())
+
+    def update(self, current_time):
+        """Remove slows that expired before current_time and restore speeds"""
+        heap = self._expiry
+        while heap and heap[0][0] < current_time:
+            expires_at, _, uid, enemy, source = heapq.heappop(heap)
+            active = self.slows.get(uid)
+            if active is None:
+                continue
+            entry = active.get(source)
+            if entry is None or entry[1] != expires_at:
+                continue  # Superseded by a later apply_slow from the same source
+            del active[source]
+            if not active:
+                del self.slows[uid]
+            if enemy.uid != uid:
+                continue  # The sprite was recycled for a new spawn
+            if active:
+                enemy.speed_multiplier = min(m for m, _ in active.values())
+            else:
+                enemy.speed_multiplier = 1.0
+
+    def clear(self):
+        """Forget every slow without touching enemy speeds"""
+        self.slows.clear()
+        self._expiry = []
@@ -0,0 +1,77 @@
+from collections import OrderedDict, deque
+
+import pygame
+
+_fonts = {}  # (font_name, size): pygame.font.Font
+_pending_fonts = deque()  # (font_name, size) queued by preload_fonts()
+
+
+def get_font(size, font_name=None):
+    """Return a shared Font, loading it on first use"""
+    key = (font_name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(font_name, size)
+        _fonts[key] = font
+    return font
+
+
+def preload_fonts(sizes, font_name=None):
+    """Queue fonts of the given sizes for load_pending_fonts().
+
+    Fonts are only ever created on the main thread, since SDL_ttf is not
+    thread-safe. Screens that need a font before it is preloaded simply
+    load it themselves.
+    """
+    _pending_fonts.extend((font_name, size) for size in sizes)
+
+
+def load_pending_fonts(count=2):
+    """Load up to count fonts queued by preload_fonts(); call once per menu frame"""
+    for _ in range(min(count, len(_pending_fonts))):
+        font_name, size = _pending_fonts.popleft()
+        get_font(size, font_name)
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces.
+
+    Surfaces are keyed by font, size, text and color, so HUD strings that
+    did not change since the last frame are blitted without re-rendering.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, size, color, font_name=None, antialias=True):
+        """Return a surface for text, rendering it only on a cache miss"""
+        key = (font_name, size, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = get_font(size, font_name).render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """Drop all cached surfaces and reset the counters"""
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared cache used by the menus and the HUD
+text_cache = TextCache()
+
+
+def render_text(text, size, color, font_name=None, antialias=True):
+    """Render text through the shared cache"""
+    return text_cache.render(text, size, color, font_name, antialias)